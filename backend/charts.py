@@ -0,0 +1,60 @@
+import base64
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def lttb_indices(Y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling shared by several series.
+
+    Y is (T, S): T points of S series on a common, evenly spaced axis. In
+    each bucket the point with the largest triangle area summed over all
+    (range-normalized) series is kept, so every series can keep using one
+    date axis. Returns sorted row indices, always including first and last.
+    """
+    Y = np.asarray(Y, dtype=np.float64)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    n = len(Y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    span = np.ptp(Y, axis=0)
+    Y = (Y - Y.min(axis=0)) / np.where(span > 0, span, 1.0)
+    x = np.arange(n, dtype=np.float64)
+    every = (n - 2) / (n_out - 2)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = a = 0
+    for i in range(n_out - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        nxt_hi = min(int((i + 2) * every) + 1, n)
+        avg_x = x[hi:nxt_hi].mean()
+        avg_y = Y[hi:nxt_hi].mean(axis=0)
+        area = np.abs((x[a] - avg_x) * (Y[lo:hi] - Y[a]) - (x[a] - x[lo:hi, None]) * (avg_y - Y[a])).sum(axis=1)
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def encode_f32(values: np.ndarray) -> str:
+    """Base64 of little-endian float32, decodable with `new Float32Array(buf)`"""
+    return base64.b64encode(np.asarray(values, dtype="<f4").tobytes()).decode("ascii")
+
+
+def compact_series(dates: List[str], series: Dict[str, np.ndarray], max_points: Optional[int] = None,
+                   decimals: int = 4, encoding: str = "json") -> dict:
+    """Build a shared-axis chart payload: {"dates", "series"} or {"dates", "encoded"}"""
+    names = list(series)
+    Y = np.column_stack([series[k] for k in names])
+    idx = lttb_indices(Y, max_points) if max_points else np.arange(len(Y))
+    Y = Y[idx]
+    out = {"dates": [dates[i] for i in idx]}
+    if encoding == "f32":
+        out["encoded"] = {k: encode_f32(Y[:, j]) for j, k in enumerate(names)}
+    else:
+        Y = np.round(Y, decimals)
+        out["series"] = {k: Y[:, j].tolist() for j, k in enumerate(names)}
+    return out
@@ -0,0 +1,177 @@
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+from profile_cache import normalize_answer
+
+# Minimum confidence on the questionnaire fields for the rule result to be
+# used without asking the LLM; set above 1 to always use the LLM
+FAST_PATH_THRESHOLD = float(os.environ.get("FAST_PATH_THRESHOLD", "0.7"))
+
+# The three questions target these fields; income stability and knowledge
+# are never asked directly, so their defaults do not force an LLM call
+GATED_FIELDS = ("loss_aversion", "liquidity_need", "timeline_years")
+
+LOSS_ORDER = ["very_low", "low", "moderate", "high", "very_high"]
+
+NEGATION = r"\b(not|never|wouldn'?t|won'?t|don'?t|didn'?t|can'?t|couldn'?t|shouldn'?t|no need to)\s+(\w+\s+){0,2}"
+# "I would not panic", "never pull my money out": read as holding
+NEGATED_EXIT = re.compile(NEGATION + r"(sell\w*|panic\w*|exit\w*|get out|cash out|pull (it |everything |my money )?out)\b")
+# Any other negation right before a matched rule or one of its keyword groups
+# ("wouldn't buy more", "stay invested, i am not worried") flips its meaning
+NEGATED_MATCH = re.compile(NEGATION + r"$")
+
+# (pattern, loss_aversion, confidence), most specific first
+LOSS_RULES = [
+    (re.compile(r"\b(panic|sell (it )?all|sell everything|get out|cash out|pull (it|everything|my money) out|exit)\b"), "very_high", 0.9),
+    (re.compile(r"\b(buy|invest|add|put in) (a lot|much|way|aggressively|heavily) more\b|\bdouble down\b|\ball in\b"), "very_low", 0.85),
+    (re.compile(r"\b(buy|invest|add|put in)( some)? more\b|\bbuy(ing)? (the dip|opportunity)\b|\bopportunity\b"), "low", 0.85),
+    (re.compile(r"\b(sell|selling|sold) (some|part|a (bit|portion|little))\b|\b(reduce|trim|cut back)\b"), "high", 0.8),
+    (re.compile(r"\bsell\w*\b"), "very_high", 0.7),
+    (re.compile(r"\b(hold|stay|keep|wait)\w*\b.*\b(stress|nervous|anxious|worr|scared|uneasy|uncomfortable|lose sleep)"), "high", 0.75),
+    (re.compile(r"\b(hold|stay (the course|invested|put)|keep (it|investing|calm)|do nothing|nothing|wait( it out)?|ride it out)\b"), "moderate", 0.8),
+]
+
+# answer2: preference for stability (+1 = cautious, -1 = risk seeking)
+CAUTIOUS_PREF = re.compile(r"\b(steady|stable|stability|safe|safety|low risk|conservative|protect|preserv)\w*")
+RISKY_PREF = re.compile(r"\b(high (gains|returns|growth)|aggressive|volatility (is )?(ok|fine)|love (risk|volatility)|maximi[sz]e)\w*")
+
+NO_NEEDS = re.compile(r"^(no|none|nothing|nope|nah|not really)\b(?![\s,]*(idea|clue|sure|certain))|\bno (major|large|big|significant)?\s*(expenses|cash needs|needs|plans|purchases|withdrawals)\b")
+NEED_KEYWORDS = re.compile(r"\b(down ?payment|house|home|flat|apartment|wedding|marriage|car|tuition|school|college|education|medical|surgery|hospital|travel|trip|renovation|emergency|loan|baby|business|retire\w*)\b")
+
+WORD_NUMBERS = {"one": 1, "a": 1, "an": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+                "seven": 7, "eight": 8, "nine": 9, "ten": 10, "couple of": 2, "few": 3}
+# Ages ("a 2 year old baby", "i'm 35 years old") are not horizons
+NOT_AGE = r"(?![\s-]*old\b)"
+RANGE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:-|–|to)\s*(\d+(?:\.\d+)?)\s*(years?|yrs?|months?)" + NOT_AGE)
+NUMBER_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(years?|yrs?|y\b|months?|mos?\b)" + NOT_AGE)
+WORD_RE = re.compile(r"\b(one|a|an|two|three|four|five|six|seven|eight|nine|ten|couple of|few)\s+(years?|months?)\b" + NOT_AGE)
+
+INCOME_RULES = [
+    (re.compile(r"\b(unemployed|lost (my|the) job|between jobs|no income|laid off|jobless)\b"), "unstable", 0.8),
+    (re.compile(r"\b(freelanc\w*|self[- ]employed|own (a )?business|commission|gig|contract\w*|irregular|variable income)\b"), "variable", 0.7),
+    (re.compile(r"\b(stable (job|income)|salary|salaried|government job|pension|steady (job|income|paycheck))\b"), "stable", 0.7),
+]
+KNOWLEDGE_RULES = [
+    (re.compile(r"\b(sharpe|sortino|beta|alpha|drawdown|duration|rebalanc\w*|asset allocation|derivatives?|options)\b"), "advanced", 0.6),
+    (re.compile(r"\b(etfs?|index funds?|mutual funds?|sip|diversif\w*|nifty|bonds?|equit(y|ies)|portfolio)\b"), "intermediate", 0.6),
+]
+
+
+def _horizon_years(text: str) -> Optional[float]:
+    m = RANGE_RE.search(text)
+    if m:
+        years = (float(m.group(1)) + float(m.group(2))) / 2
+        return years / 12 if m.group(3).startswith("month") else years
+    m = NUMBER_RE.search(text)
+    if m:
+        value = float(m.group(1))
+        return value / 12 if m.group(2).startswith("mo") else value
+    m = WORD_RE.search(text)
+    if m:
+        value = WORD_NUMBERS[m.group(1)]
+        return value / 12 if m.group(2).startswith("month") else float(value)
+    if re.search(r"\bnext year\b", text):
+        return 1.0
+    if re.search(r"\b(this year|soon|immediately|right away)\b", text):
+        return 0.5
+    return None
+
+
+def _loss_aversion(a1: str, a2: str) -> Tuple[str, float]:
+    a1 = NEGATED_EXIT.sub("hold", a1)
+    matches = []
+    negated = False
+    for pattern, level, conf in LOSS_RULES:
+        m = pattern.search(a1)
+        if m:
+            matches.append((level, conf))
+            starts = [m.start()] + [m.start(g) for g in range(1, pattern.groups + 1) if m.start(g) >= 0]
+            negated = negated or any(NEGATED_MATCH.search(a1[:i]) for i in starts)
+    if not matches:
+        return "moderate", 0.2
+    level, conf = matches[0]
+    if negated:
+        conf = min(conf, 0.4)
+    spread = max(LOSS_ORDER.index(l) for l, _ in matches) - min(LOSS_ORDER.index(l) for l, _ in matches)
+    if spread > 1:
+        # e.g. "sell bonds and buy more stocks": leave it to the LLM
+        conf = min(conf, 0.4)
+
+    cautious, risky = bool(CAUTIOUS_PREF.search(a2)), bool(RISKY_PREF.search(a2))
+    rank = LOSS_ORDER.index(level)
+    if cautious != risky:
+        agrees = (cautious and rank >= 2) or (risky and rank <= 2)
+        conf = min(conf + 0.1, 0.95) if agrees else conf - 0.2
+    return level, round(conf, 2)
+
+
+def _liquidity_and_timeline(a3: str) -> Tuple[str, float, float, float]:
+    years = _horizon_years(a3)
+    has_need = bool(NEED_KEYWORDS.search(a3))
+    if NO_NEEDS.search(a3) and not has_need:
+        # The question asks about cash needs only; without a stated horizon the LLM decides
+        if years is None:
+            return "low", 0.85, 10.0, 0.3
+        return "low", 0.85, round(years, 2), 0.9
+    if years is None:
+        if has_need:
+            return "moderate", 0.5, 3.0, 0.3
+        return "moderate", 0.2, 5.0, 0.2
+    liquidity = "high" if years <= 3 else "moderate" if years <= 7 else "low"
+    return liquidity, 0.85 if has_need else 0.7, round(years, 2), 0.9
+
+
+def _first_match(rules, text: str, default: str, default_conf: float) -> Tuple[str, float]:
+    for pattern, value, conf in rules:
+        if pattern.search(text):
+            return value, conf
+    return default, default_conf
+
+
+def _goal(a2: str, a3: str) -> str:
+    m = NEED_KEYWORDS.search(a3)
+    if m and not NO_NEEDS.search(a3):
+        return m.group(1).replace("downpayment", "down payment")
+    if RISKY_PREF.search(a2):
+        return "high growth"
+    return "steady growth"
+
+
+def extract_profile(answers) -> Tuple[dict, Dict[str, float]]:
+    """Rule-based RiskProfile dict plus a confidence (0..1) for every field"""
+    a1, a2, a3 = (normalize_answer(answers.answer1), normalize_answer(answers.answer2),
+                  normalize_answer(answers.answer3))
+    everything = " ".join((a1, a2, a3))
+
+    loss, loss_conf = _loss_aversion(a1, a2)
+    liquidity, liq_conf, timeline, timeline_conf = _liquidity_and_timeline(a3)
+    income, income_conf = _first_match(INCOME_RULES, everything, "variable", 0.3)
+    knowledge, knowledge_conf = _first_match(KNOWLEDGE_RULES, everything, "novice", 0.4)
+
+    confidences = {
+        "loss_aversion": loss_conf,
+        "liquidity_need": liq_conf,
+        "timeline_years": timeline_conf,
+        "income_stability": income_conf,
+        "knowledge_level": knowledge_conf,
+    }
+    obj = {
+        "goal": _goal(a2, a3),
+        "timeline_years": timeline,
+        "loss_aversion": loss,
+        "liquidity_need": liquidity,
+        "income_stability": income,
+        "knowledge_level": knowledge,
+        "notes": "Inferred by keyword rules from the questionnaire answers.",
+        "confidences": {k: confidences[k] for k in GATED_FIELDS},
+    }
+    return obj, confidences
+
+
+def fast_profile(answers, threshold: float = FAST_PATH_THRESHOLD) -> Optional[dict]:
+    """The rule-based profile if every gated field clears `threshold`, else None"""
+    obj, confidences = extract_profile(answers)
+    if min(confidences[k] for k in GATED_FIELDS) < threshold:
+        return None
+    return obj
@@ -0,0 +1,302 @@
+"""
+Bulk profiling jobs: re-profile a file of questionnaire records offline.
+
+Each job lives in its own directory under JOBS_DIR:
+
+    input.jsonl / input.csv   submitted records (answer1, answer2, answer3, optional id)
+    results.jsonl             one line per finished record, appended as records complete
+    job.json                  status, counters and timing, replaced atomically
+
+results.jsonl doubles as the checkpoint: a job that was interrupted re-reads
+it on startup, drops a torn last line and only processes the records that
+are not in it. Records go through the LLM at bulk priority with at most
+JOB_CONCURRENCY in flight, so interactive /profile requests keep precedence.
+"""
+import os
+import csv
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from llm_client import LLMOverloaded
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process claim, run a single worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.environ.get(
+    "JOBS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "jobs")
+)
+# Records of one job in flight at once (each holds at most one LLM slot)
+JOB_CONCURRENCY = int(os.environ.get("JOB_CONCURRENCY", "4"))
+# Seconds between job.json updates while a job runs
+JOB_CHECKPOINT_SECONDS = float(os.environ.get("JOB_CHECKPOINT_SECONDS", "2"))
+
+UNFINISHED = ("queued", "running")
+ANSWER_FIELDS = ("answer1", "answer2", "answer3")
+
+
+def read_records(path: str) -> List[dict]:
+    """Records of a JSONL (one object per line) or CSV (header row) file"""
+    # utf-8-sig: Excel starts its CSV exports with a byte order mark
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.endswith(".csv"):
+            return list(csv.DictReader(f))
+        records = []
+        for n, line in enumerate(f, 1):
+            if line.strip():
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError(f"Line {n} is not a JSON object")
+                records.append(record)
+        return records
+
+
+def completed_indices(path: str) -> Dict[int, bool]:
+    """{index: succeeded} of the records in a results file, truncating a torn last line"""
+    done = {}
+    try:
+        with open(path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                # Crashed mid-write: drop the partial line so appends start on a fresh one
+                f.truncate(end)
+    except FileNotFoundError:
+        return done
+    for line in data[:end].splitlines():
+        result = json.loads(line)
+        done[result["index"]] = "error" not in result
+    return done
+
+
+@contextmanager
+def claim(job_dir: str):
+    """Non-blocking exclusive lock on a job; yields False if another process runs it"""
+    with open(os.path.join(job_dir, ".lock"), "a") as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        try:
+            yield True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class JobManager:
+    """Runs profiling jobs one after another, each with bounded concurrency.
+
+    `process(record, variant)` turns one input record into the result fields
+    written to results.jsonl; it may raise LLMOverloaded to have the record
+    retried after the suggested delay instead of failing it.
+    """
+
+    def __init__(self, process: Callable[[dict, str], Awaitable[dict]], path: str = JOBS_DIR,
+                 concurrency: int = JOB_CONCURRENCY, checkpoint_seconds: float = JOB_CHECKPOINT_SECONDS):
+        self.process = process
+        self.path = path
+        self.concurrency = concurrency
+        self.checkpoint_seconds = checkpoint_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._write_lock = asyncio.Lock()
+        self._runner: Optional[asyncio.Task] = None
+
+    def _dir(self, job_id: str) -> str:
+        return os.path.join(self.path, job_id)
+
+    def _read(self, job_id: str) -> Optional[dict]:
+        # Job ids are generated hex strings; anything else cannot name a job
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(os.path.join(self._dir(job_id), "job.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, job: dict):
+        path = os.path.join(self._dir(job["id"]), "job.json")
+        # Unique temp name: a write abandoned by a cancelled task may still be running
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(job, f, indent=2)
+        os.replace(tmp, path)
+
+    async def _save(self, job: dict):
+        """_write() in a worker thread, one at a time and in order, off the event loop"""
+        async with self._write_lock:
+            await asyncio.to_thread(self._write, dict(job))
+
+    def results(self, job_id: str) -> Optional[bytes]:
+        """Complete lines of a job's results file so far (the last one may still be being written)"""
+        if self._read(job_id) is None:
+            return None
+        try:
+            with open(os.path.join(self._dir(job_id), "results.jsonl"), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return b""
+        return data[:data.rfind(b"\n") + 1]
+
+    async def start(self):
+        """Start the runner and queue jobs left unfinished by a previous process"""
+        self._queue = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+        for job in self.list():
+            if job["status"] in UNFINISHED:
+                self._queue.put_nowait(job["id"])
+        self._runner = asyncio.create_task(self._run_all())
+
+    async def stop(self):
+        # Running jobs keep status "running" and resume on the next start
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+
+    def submit(self, filename: str, content: bytes, variant: str) -> dict:
+        """Store an uploaded file as a new job and queue it"""
+        suffix = ".csv" if filename.lower().endswith(".csv") else ".jsonl"
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self._dir(job_id)
+        os.makedirs(job_dir)
+        input_path = os.path.join(job_dir, "input" + suffix)
+        with open(input_path, "wb") as f:
+            f.write(content)
+        try:
+            records = read_records(input_path)
+            missing = sorted({k for record in records for k in ANSWER_FIELDS if k not in record})
+            if missing:
+                raise ValueError(f"records without {', '.join(missing)}")
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            shutil.rmtree(job_dir)
+            raise ValueError(f"Cannot read {filename}: {e}")
+        total = len(records)
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "filename": filename,
+            "input_file": os.path.basename(input_path),
+            "variant": variant,
+            "total": total,
+            "succeeded": 0,
+            "failed": 0,
+            "elapsed_seconds": 0.0,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+        self._write(job)
+        # Called from a worker thread by the route; asyncio.Queue is not thread-safe
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, job_id)
+        logger.info(f"Queued profiling job {job_id} with {total} records")
+        return self.status(job_id)
+
+    def status(self, job_id: str) -> Optional[dict]:
+        """job.json plus derived progress, throughput (records/min) and ETA"""
+        job = self._read(job_id)
+        if job is None:
+            return None
+        processed = job["succeeded"] + job["failed"]
+        rate = processed / job["elapsed_seconds"] * 60 if job["elapsed_seconds"] > 0 else None
+        remaining = job["total"] - processed
+        return {
+            **job,
+            "processed": processed,
+            "progress": round(processed / job["total"], 4) if job["total"] else 1.0,
+            "records_per_min": round(rate, 2) if rate else None,
+            "eta_seconds": round(remaining / rate * 60, 1) if rate and job["status"] in UNFINISHED else None,
+        }
+
+    def list(self) -> List[dict]:
+        if not os.path.isdir(self.path):
+            return []
+        jobs = [self.status(name) for name in os.listdir(self.path)]
+        return sorted((j for j in jobs if j is not None), key=lambda j: j["created_at"])
+
+    async def _run_all(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.run(job_id)
+            except Exception as e:
+                logger.error(f"Profiling job {job_id} failed: {e}")
+                job = await asyncio.to_thread(self._read, job_id)
+                if job is not None:
+                    job.update(status="failed", error=str(e), finished_at=time.time())
+                    await self._save(job)
+
+    async def run(self, job_id: str):
+        """Process the records of a job not yet in its results file"""
+        job_dir = self._dir(job_id)
+        with claim(job_dir) as claimed:
+            if not claimed:
+                logger.info(f"Profiling job {job_id} is running in another process")
+                return
+            # File work runs in threads: interactive requests share this event loop
+            job = await asyncio.to_thread(self._read, job_id)
+            if job is None or job["status"] not in UNFINISHED:
+                return
+            records = await asyncio.to_thread(read_records, os.path.join(job_dir, job["input_file"]))
+            results_path = os.path.join(job_dir, "results.jsonl")
+            done = await asyncio.to_thread(completed_indices, results_path)
+            job.update(status="running", total=len(records), started_at=job["started_at"] or time.time(),
+                       succeeded=sum(done.values()), failed=len(done) - sum(done.values()))
+            await self._save(job)
+
+            pending = iter([i for i in range(len(records)) if i not in done])
+            elapsed_before = job["elapsed_seconds"]
+            run_start = last_checkpoint = time.monotonic()
+
+            with open(results_path, "a", encoding="utf-8") as out:
+                async def worker():
+                    nonlocal last_checkpoint
+                    for i in pending:
+                        result = await self._process_record(i, records[i], job["variant"])
+                        out.write(json.dumps(result) + "\n")
+                        out.flush()
+                        job["failed" if "error" in result else "succeeded"] += 1
+                        now = time.monotonic()
+                        if now - last_checkpoint >= self.checkpoint_seconds:
+                            last_checkpoint = now
+                            job["elapsed_seconds"] = elapsed_before + now - run_start
+                            await self._save(job)
+
+                try:
+                    await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+                finally:
+                    job["elapsed_seconds"] = elapsed_before + time.monotonic() - run_start
+                    await self._save(job)
+
+            job.update(status="completed", finished_at=time.time())
+            await self._save(job)
+            rate = (await asyncio.to_thread(self.status, job_id))["records_per_min"]
+            logger.info(f"Profiling job {job_id} completed: {job['succeeded']} ok, {job['failed']} failed, "
+                        f"{rate} records/min")
+
+    async def _process_record(self, index: int, record: dict, variant: str) -> dict:
+        while True:
+            try:
+                return {"index": index, "id": record.get("id"), **await self.process(record, variant)}
+            except LLMOverloaded as e:
+                # Interactive traffic has the LLM queue; wait for room rather than failing the record
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                return {"index": index, "id": record.get("id"), "error": str(e)}
@@ -0,0 +1,126 @@
+import re
+import json
+import difflib
+
+_decoder = json.JSONDecoder()
+
+
+def _skip_ws(text: str, i: int) -> int:
+    while i < len(text) and text[i] in " \t\r\n":
+        i += 1
+    return i
+
+
+def partial_json_fields(text: str) -> dict:
+    """Top-level fields of a (possibly still streaming) JSON object that are
+    already complete. Parsing stops at the first key or value that is cut off.
+    """
+    fields = {}
+    i = text.find("{")
+    if i < 0:
+        return fields
+    i += 1
+    while True:
+        i = _skip_ws(text, i)
+        if i < len(text) and text[i] == ",":
+            i = _skip_ws(text, i + 1)
+        if i >= len(text) or text[i] == "}":
+            return fields
+        try:
+            key, i = _decoder.raw_decode(text, i)
+            i = _skip_ws(text, i)
+            if i >= len(text) or text[i] != ":":
+                return fields
+            i = _skip_ws(text, i + 1)
+            value, end = _decoder.raw_decode(text, i)
+        except json.JSONDecodeError:
+            return fields
+        # A number at the very end may still be growing ("3" -> "35")
+        if end >= len(text) and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return fields
+        if not isinstance(key, str):
+            return fields
+        fields[key] = value
+        i = end
+
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_NUMBER = re.compile(r"(?<![\d.])-?\d+(?:\.\d+)?")  # "2-3" -> 2, 3
+
+# Common LLM spellings of enum values that string similarity gets wrong
+ENUM_SYNONYMS = {
+    "medium": "moderate",
+    "average": "moderate",
+    "mid": "moderate",
+    "beginner": "novice",
+    "basic": "novice",
+    "expert": "advanced",
+    "experienced": "advanced",
+    "steady": "stable",
+    "irregular": "variable",
+    "volatile": "unstable",
+}
+
+
+def extract_json_object(text: str):
+    """Best-effort JSON object from LLM output that json.loads rejected.
+
+    Handles prose or code fences around the object, trailing commas and
+    output truncated mid-object (keeping the fields that were complete).
+    Returns None if nothing usable is found.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    candidate = _TRAILING_COMMA.sub(r"\1", text[start:])
+    try:
+        obj, _ = _decoder.raw_decode(candidate)
+        if isinstance(obj, dict):
+            return obj
+    except json.JSONDecodeError:
+        pass
+    return partial_json_fields(candidate) or None
+
+
+def coerce_number(v):
+    """Float from numbers or strings like "3", "~3 years", "2-3"; None if there is no number"""
+    if isinstance(v, bool):
+        return None
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, str):
+        nums = [float(n) for n in _NUMBER.findall(v.replace(",", ""))]
+        if nums:
+            return sum(nums[:2]) / len(nums[:2])
+    return None
+
+
+def match_enum(value, allowed):
+    """Map a near-miss enum value ("Very High", "very-high", "medium") onto `allowed`"""
+    if not isinstance(value, str):
+        return None
+    v = re.sub(r"[\s\-]+", "_", value.strip().lower())
+    if v in allowed:
+        return v
+    v = ENUM_SYNONYMS.get(v, v)
+    if v in allowed:
+        return v
+    close = difflib.get_close_matches(v, allowed, n=1, cutoff=0.6)
+    return close[0] if close else None
+
+
+def missing_required_enums(obj: dict, schema: dict) -> list:
+    """Required enum properties of the schema that `obj` lacks or leaves empty"""
+    properties = schema.get("properties", {})
+    return [name for name in schema.get("required", [])
+            if "enum" in properties.get(name, {}) and obj.get(name) in (None, "")]
+
+
+def repair_enums(obj: dict, schema: dict) -> dict:
+    """Fuzzy-match every enum property of `obj` onto the schema's allowed values"""
+    for name, prop in schema.get("properties", {}).items():
+        allowed = prop.get("enum")
+        if allowed and name in obj and obj[name] not in allowed:
+            matched = match_enum(obj[name], allowed)
+            obj[name] = matched if matched is not None else prop.get("default")
+    return obj
@@ -0,0 +1,288 @@
+import os
+import json
+import math
+import heapq
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Union
+
+import httpx
+
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
+# Comma-separated Ollama nodes, optionally with their own slot count: "http://a:11434=2,http://b:11434"
+OLLAMA_URLS = os.environ.get("OLLAMA_URLS", OLLAMA_URL)
+OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "risk-profiler")
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "120"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+# Generations allowed to wait for a slot before new ones are rejected
+LLM_QUEUE_SIZE = int(os.environ.get("LLM_QUEUE_SIZE", "32"))
+# How long Ollama keeps the model loaded after a request; -1 pins it
+LLM_KEEP_ALIVE = os.environ.get("LLM_KEEP_ALIVE", "-1")
+# Seconds a backend that failed to connect is tried only after the others
+LLM_BACKEND_COOLDOWN = float(os.environ.get("LLM_BACKEND_COOLDOWN", "10"))
+
+# Lower runs first when generations are queued
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+logger = logging.getLogger(__name__)
+
+
+def parse_keep_alive(value: str) -> Union[int, str]:
+    """Ollama takes seconds as a number or a duration string ("30m")"""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+class LLMOverloaded(Exception):
+    """The generation queue is full; retry after `retry_after` seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"LLM queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class OllamaClient:
+    """Asyncio-native client for Ollama's streaming /api/generate endpoint.
+
+    Keeps one pooled httpx.AsyncClient per process so generations reuse
+    keep-alive connections. Slots, queueing and deadlines are handled by
+    LLMDispatcher, which owns one client per Ollama node.
+    """
+
+    def __init__(self, base_url: str = OLLAMA_URL, model: str = OLLAMA_MODEL,
+                 timeout: float = LLM_TIMEOUT, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 keep_alive: str = LLM_KEEP_ALIVE):
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.keep_alive = parse_keep_alive(keep_alive)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                # No read timeout: a generation may stall between tokens, the
+                # dispatcher's per-request deadline bounds the total time.
+                timeout=httpx.Timeout(10.0, read=None),
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+            )
+        return self._client
+
+    def _payload(self, prompt: str, format="json", options: Optional[dict] = None) -> dict:
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "format": format,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            "options": options or {"temperature": 0.2},
+        }
+
+    async def preload(self):
+        """Load the model into memory (a generate call without a prompt)"""
+        client = self._get_client()
+        r = await client.post("/api/generate", json={"model": self.model, "keep_alive": self.keep_alive,
+                                                     "stream": False}, timeout=self.timeout)
+        r.raise_for_status()
+
+    async def stream(self, prompt: str, format="json", options: Optional[dict] = None) -> AsyncIterator[str]:
+        """Yield 'response' chunks as Ollama streams them"""
+        client = self._get_client()
+        async with client.stream("POST", "/api/generate", json=self._payload(prompt, format, options)) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line:
+                    continue
+                obj = json.loads(line)
+                if obj.get("error"):
+                    raise RuntimeError(f"Ollama error: {obj['error']}")
+                yield obj.get("response", "")
+                if obj.get("done"):
+                    break
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class Backend:
+    """One Ollama node and its slot accounting inside LLMDispatcher"""
+
+    def __init__(self, client: OllamaClient, max_concurrency: int):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.completed = 0
+        self.failures = 0
+        self.down_until = 0.0
+
+    def stats(self) -> dict:
+        return {"url": self.client.base_url, "in_flight": self.in_flight, "max_concurrency": self.max_concurrency,
+                "completed": self.completed, "failures": self.failures}
+
+
+class LLMDispatcher:
+    """Bounded, prioritized work queue in front of one or more Ollama backends.
+
+    Each backend runs at most `max_concurrency` generations; a new one goes
+    to the least-loaded backend with a free slot, otherwise it waits in a
+    priority queue of at most `max_queue` entries. Beyond that it fails fast
+    with LLMOverloaded (and a Retry-After estimate) instead of piling up
+    until it times out.
+    """
+
+    def __init__(self, backends: List[Backend], max_queue: int = LLM_QUEUE_SIZE):
+        if not backends:
+            raise ValueError("LLMDispatcher needs at least one backend")
+        self.backends = backends
+        self.max_queue = max_queue
+        self.model = backends[0].client.model
+        self.timeout = backends[0].client.timeout
+        self._waiters = []              # heap of [priority, seq, future]
+        self._seq = itertools.count()
+        self._avg_seconds = None        # EWMA of generation time, for Retry-After
+        self._stats = {"rejected": 0, "queued": 0}
+
+    @classmethod
+    def from_env(cls, urls: str = OLLAMA_URLS, max_queue: int = LLM_QUEUE_SIZE) -> "LLMDispatcher":
+        backends = []
+        for spec in urls.split(","):
+            url, _, slots = spec.strip().partition("=")
+            if url:
+                slots = int(slots) if slots else LLM_MAX_CONCURRENCY
+                backends.append(Backend(OllamaClient(url.rstrip("/"), max_concurrency=slots), slots))
+        return cls(backends, max_queue)
+
+    @property
+    def base_url(self) -> str:
+        return ", ".join(b.client.base_url for b in self.backends)
+
+    def _pick(self) -> Optional[Backend]:
+        now = asyncio.get_running_loop().time()
+        free = [b for b in self.backends if b.in_flight < b.max_concurrency]
+        if not free:
+            return None
+        return min(free, key=lambda b: (b.down_until > now, b.in_flight / b.max_concurrency, b.in_flight))
+
+    def retry_after(self) -> int:
+        per_generation = self._avg_seconds or 5.0
+        capacity = sum(b.max_concurrency for b in self.backends)
+        return max(1, min(60, math.ceil(per_generation * (len(self._waiters) + 1) / capacity)))
+
+    def check_capacity(self):
+        """Raise LLMOverloaded now if a new generation would be rejected"""
+        if len(self._waiters) >= self.max_queue and self._pick() is None:
+            self._stats["rejected"] += 1
+            raise LLMOverloaded(self.retry_after())
+
+    async def _acquire(self, priority: int) -> Backend:
+        backend = None if self._waiters else self._pick()
+        if backend is not None:
+            backend.in_flight += 1
+            return backend
+        self.check_capacity()
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), future]
+        heapq.heappush(self._waiters, entry)
+        self._stats["queued"] += 1
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # A slot was handed over just as we were cancelled
+                self._release(future.result())
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def _release(self, backend: Backend):
+        backend.in_flight -= 1
+        while self._waiters:
+            nxt = self._pick()
+            if nxt is None:
+                return
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                nxt.in_flight += 1
+                future.set_result(nxt)
+
+    @asynccontextmanager
+    async def _slot(self, priority: int, timeout: Optional[float] = None):
+        backend = await asyncio.wait_for(self._acquire(priority), timeout)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            yield backend.client
+        except httpx.TransportError:
+            backend.failures += 1
+            backend.down_until = loop.time() + LLM_BACKEND_COOLDOWN
+            raise
+        else:
+            backend.completed += 1
+            elapsed = loop.time() - started
+            self._avg_seconds = elapsed if self._avg_seconds is None else 0.8 * self._avg_seconds + 0.2 * elapsed
+        finally:
+            self._release(backend)
+
+    async def generate(self, prompt: str, timeout: Optional[float] = None, format="json",
+                       options: Optional[dict] = None, priority: int = PRIORITY_INTERACTIVE) -> str:
+        """Queue, run one generation and return its text.
+
+        The deadline covers queueing and generation; raises LLMOverloaded
+        without waiting if the queue is full.
+        """
+        data = ""
+        async for chunk in self.generate_stream(prompt, timeout, format, options, priority):
+            data += chunk
+        return data
+
+    async def generate_stream(self, prompt: str, timeout: Optional[float] = None, format="json",
+                              options: Optional[dict] = None,
+                              priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[str]:
+        """Like generate(), but yields chunks as they arrive.
+
+        Holds the slot for the whole stream and raises asyncio.TimeoutError
+        once the deadline passes, even mid-stream.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+        async with self._slot(priority, deadline - loop.time()) as client:
+            chunks = client.stream(prompt, format, options).__aiter__()
+            try:
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+                    except StopAsyncIteration:
+                        return
+                    yield chunk
+            finally:
+                # Closing the stream drops the HTTP response, which stops the generation
+                await chunks.aclose()
+
+    async def preload(self):
+        """Load (and, with keep_alive -1, pin) the model on every backend"""
+        results = await asyncio.gather(*(b.client.preload() for b in self.backends), return_exceptions=True)
+        for backend, result in zip(self.backends, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Could not preload {self.model} on {backend.client.base_url}: {result}")
+
+    def stats(self) -> dict:
+        return {**self._stats, "waiting": len(self._waiters), "max_queue": self.max_queue,
+                "avg_generation_seconds": self._avg_seconds, "backends": [b.stats() for b in self.backends]}
+
+    async def aclose(self):
+        for backend in self.backends:
+            await backend.client.aclose()
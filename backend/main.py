@@ -1,19 +1,71 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, File, Form, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+import json
+import time
+import asyncio
 import logging
 
 from models import *
 from services import RiskProfilerService
+from llm_client import LLMOverloaded
+from result_cache import etag_matches
+from serialization import FastJSONResponse
+from timings import REQUEST_SECONDS, begin_request, end_request, server_timing_header, render_metrics
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Initialize service
+risk_profiler = RiskProfilerService()
+
+async def warm_up():
+    try:
+        await run_in_threadpool(risk_profiler.warm_up)
+    except Exception as e:
+        logger.error(f"Market data warm-up failed: {str(e)}")
+
+def overloaded(e: LLMOverloaded) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def cache_headers(etag: str) -> dict:
+    # no-cache: clients may store the response but must revalidate it (a cheap 304 while data is unchanged)
+    return {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+
+def parse_pairs(text: str) -> Dict[str, float]:
+    """Query-string mapping: "equity:0.6,bonds:0.35" -> {"equity": 0.6, "bonds": 0.35}"""
+    pairs = {}
+    for item in filter(None, text.split(",")):
+        key, sep, value = item.partition(":")
+        if not sep:
+            raise ValueError(f"Expected key:value, got {item!r}")
+        pairs[key.strip()] = float(value)
+    return pairs
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load market data in the background; /ready reports when it is done
+    warm_up_task = asyncio.create_task(warm_up())
+    # Load and pin the model on every Ollama backend so the first /profile is not a cold start
+    preload_task = asyncio.create_task(risk_profiler.llm.preload())
+    # Resume bulk profiling jobs interrupted by the last shutdown
+    await risk_profiler.jobs.start()
+    yield
+    warm_up_task.cancel()
+    preload_task.cancel()
+    await risk_profiler.jobs.stop()
+    # Release pooled Ollama connections on shutdown
+    await risk_profiler.llm.aclose()
+
 app = FastAPI(
     title="Risk Profiler API",
     description="Financial Risk Profiling and Portfolio Analytics API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware for frontend access
@@ -25,8 +77,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize service
-risk_profiler = RiskProfilerService()
+@app.middleware("http")
+async def record_timings(request, call_next):
+    """Per-request latency histogram plus a Server-Timing header with the stages the request ran"""
+    timings, token = begin_request()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        end_request(token)
+    total = time.perf_counter() - start
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(total, request.method, route.path if route else "unmatched", str(response.status_code))
+    response.headers["Server-Timing"] = server_timing_header(timings + [("total", total)])
+    return response
 
 @app.get("/")
 async def root():
@@ -36,6 +100,26 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "risk-profiler-api"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Ready once market data is loaded, so /analytics will not block on a download"""
+    content = {
+        "ready": risk_profiler.is_ready,
+        "data_version": risk_profiler.data_version,
+        "data_age_seconds": risk_profiler.data_age(),
+        "last_refresh_error": risk_profiler.last_refresh_error,
+    }
+    return JSONResponse(status_code=200 if risk_profiler.is_ready else 503, content=content)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text format: per-stage and per-route latency histograms"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return risk_profiler.profile_stats()
+
 @app.post("/profile", response_model=ProfileResponse)
 async def generate_profile(request: ProfileRequest):
     """
@@ -43,13 +127,59 @@ async def generate_profile(request: ProfileRequest):
     """
     try:
         logger.info(f"Processing profile request for answers: {request.answers}")
-        result = risk_profiler.generate_profile(request.answers)
+        result = await risk_profiler.generate_profile(request.answers)
         logger.info(f"Generated profile: {result.label} with score {result.score}")
         return result
+    except LLMOverloaded as e:
+        logger.warning(f"Rejected profile request: {str(e)}")
+        raise overloaded(e)
+    except Exception as e:
+        logger.error(f"Error generating profile: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate profile: {str(e)}")
+
+def sse_event(event: str, data) -> str:
+    payload = data.model_dump_json() if isinstance(data, BaseModel) else json.dumps(data)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+@app.post("/profile/stream")
+async def stream_profile(request: ProfileRequest):
+    """
+    Server-sent events variant of /profile: "progress" and "partial" events
+    while the LLM generates, then "result" with the ProfileResponse (or "error").
+    Identical concurrent /profile and /profile/stream requests share one
+    generation; closing the connection cancels it unless another request is
+    waiting for it. 503 with Retry-After when the LLM queue is full.
+    """
+    logger.info(f"Processing streaming profile request for answers: {request.answers}")
+    stream = risk_profiler.stream_profile(request.answers)
+    try:
+        # The first event comes before any LLM work, so a full queue is still a plain 503
+        first = await stream.__anext__()
+    except LLMOverloaded as e:
+        logger.warning(f"Rejected profile request: {str(e)}")
+        raise overloaded(e)
     except Exception as e:
         logger.error(f"Error generating profile: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate profile: {str(e)}")
 
+    async def replay():
+        yield first
+        async for item in stream:
+            yield item
+
+    async def events():
+        try:
+            async for event, data in replay():
+                if event == "result":
+                    logger.info(f"Generated profile: {data.label} with score {data.score}")
+                yield sse_event(event, data)
+        except Exception as e:
+            logger.error(f"Error generating profile: {str(e)}")
+            yield sse_event("error", {"detail": f"Failed to generate profile: {str(e)}"})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.post("/weights", response_model=WeightsResponse)
 async def calculate_weights(request: WeightsRequest):
     """
@@ -71,13 +201,160 @@ async def run_analytics(request: AnalyticsRequest):
     """
     try:
         logger.info(f"Running analytics for weights: {request.user_weights}")
-        result = risk_profiler.run_analytics(request)
-        logger.info(f"Generated analytics for {len(result.portfolios)} portfolios")
-        return result
+        # Backtesting (and the first market data download) is blocking work,
+        # keep it off the event loop so /profile and /health stay responsive
+        etag, body = await run_in_threadpool(risk_profiler.cached_analytics, request)
+        return Response(content=body, media_type="application/json", headers=cache_headers(etag))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running analytics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to run analytics: {str(e)}")
+
+@app.get("/analytics", response_model=AnalyticsResponse)
+async def get_analytics(weights: str, label: str, axes: str, rebalance: str = "monthly",
+                        frequency: str = "monthly", drift_band: float = 0.05,
+                        if_none_match: Optional[str] = Header(default=None)):
+    """
+    Cacheable form of POST /analytics, with `weights` and `axes` as
+    "key:value,..." pairs. Returns 304 when If-None-Match holds the current ETag.
+    """
+    try:
+        request = AnalyticsRequest(user_weights=parse_pairs(weights), label=label, axes=parse_pairs(axes),
+                                   rebalance=rebalance, frequency=frequency, drift_band=drift_band)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        if risk_profiler.is_ready:
+            etag = risk_profiler.analytics_etag(request)
+        else:
+            etag = await run_in_threadpool(risk_profiler.analytics_etag, request)
+        if etag_matches(if_none_match, etag):
+            risk_profiler.analytics_cache.not_modified()
+            return Response(status_code=304, headers=cache_headers(etag))
+        etag, body = await run_in_threadpool(risk_profiler.cached_analytics, request)
+        return Response(content=body, media_type="application/json", headers=cache_headers(etag))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error running analytics: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to run analytics: {str(e)}")
 
+@app.post("/plan", response_model=PlanResponse)
+async def create_plan(request: PlanRequest):
+    """
+    Profile, weights for `variant` and analytics in one round trip; market
+    data loads while the LLM generates
+    """
+    try:
+        logger.info(f"Processing plan request for answers: {request.answers}")
+        content = await risk_profiler.plan_json(request)
+        return Response(content=content, media_type="application/json")
+    except LLMOverloaded as e:
+        logger.warning(f"Rejected plan request: {str(e)}")
+        raise overloaded(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating plan: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to create plan: {str(e)}")
+
+@app.post("/analytics/compact", response_model=CompactAnalyticsResponse)
+async def run_compact_analytics(request: CompactAnalyticsRequest):
+    """
+    Analytics with compact charts: one shared date axis, optional LTTB
+    downsampling to `max_points`, rounding, or float32/base64 series
+    """
+    try:
+        logger.info(f"Running compact analytics for weights: {request.user_weights}")
+        # Built without validation; returning the response also skips FastAPI's response_model pass
+        return FastJSONResponse(await run_in_threadpool(risk_profiler.run_compact_analytics, request))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running analytics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to run analytics: {str(e)}")
+
+@app.post("/analytics/batch", response_model=BatchAnalyticsResponse)
+async def run_batch_analytics(request: BatchAnalyticsRequest):
+    """
+    Backtest many weight vectors (e.g. a whole client book) in one request
+    """
+    try:
+        logger.info(f"Running batch analytics for {len(request.portfolios)} portfolios")
+        return FastJSONResponse(await run_in_threadpool(risk_profiler.run_batch_analytics, request))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running batch analytics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to run batch analytics: {str(e)}")
+
+@app.post("/projection", response_model=ProjectionResponse)
+async def run_projection(request: ProjectionRequest):
+    """
+    Monte Carlo projection of a weight vector: percentile bands of wealth over
+    `horizon_years` and the probability of reaching `target`
+    """
+    try:
+        logger.info(f"Projecting {request.n_paths} paths over {request.horizon_years}y for weights: {request.weights}")
+        return FastJSONResponse(await run_in_threadpool(risk_profiler.run_projection, request))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running projection: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to run projection: {str(e)}")
+
+@app.post("/frontier", response_model=FrontierResponse)
+async def run_frontier(request: FrontierRequest):
+    """
+    Efficient frontier over every equity/bonds/cash mix on a `step`% grid,
+    with the user's mix positioned against it (sweep cached per data version)
+    """
+    try:
+        logger.info(f"Running frontier sweep at {request.step}% for weights: {request.user_weights}")
+        return FastJSONResponse(await run_in_threadpool(risk_profiler.run_frontier, request))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running frontier sweep: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to run frontier sweep: {str(e)}")
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(file: UploadFile = File(...), variant: Variant = Form(Variant.baseline)):
+    """
+    Bulk re-profiling: upload a JSONL or CSV file of answer1/answer2/answer3
+    records (optional id); each is profiled and given `variant` weights
+    """
+    try:
+        content = await file.read()
+        return await run_in_threadpool(risk_profiler.jobs.submit, file.filename or "input.jsonl", content, variant.value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error submitting profiling job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to submit job: {str(e)}")
+
+@app.get("/jobs", response_model=List[JobStatus])
+async def list_jobs():
+    return risk_profiler.jobs.list()
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def job_status(job_id: str):
+    """Progress, counts and throughput (records/min) of a profiling job"""
+    status = risk_profiler.jobs.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return status
+
+@app.get("/jobs/{job_id}/results")
+async def job_results(job_id: str):
+    """Results so far as JSON lines: index, id and the profile and weights, or an error"""
+    content = await run_in_threadpool(risk_profiler.jobs.results, job_id)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return Response(content=content, media_type="application/x-ndjson",
+                    headers={"Content-Disposition": f'attachment; filename="{job_id}-results.jsonl"'})
+
 @app.exception_handler(ValueError)
 async def value_error_handler(request, exc):
     return JSONResponse(
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, model_validator, ConfigDict, field_validator
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Literal
 from enum import Enum
 
 class LossAversion(str, Enum):
@@ -135,6 +135,10 @@ class AnalyticsRequest(BaseModel):
     user_weights: Dict[str, float]
     label: str
     axes: Dict[str, float]
+    # Defaults reproduce the original monthly constant-mix backtest
+    rebalance: Literal["none", "monthly", "quarterly", "annual", "threshold"] = "monthly"
+    frequency: Literal["monthly", "daily"] = "monthly"
+    drift_band: float = Field(default=0.05, gt=0, lt=1)  # threshold: max |weight - target| before rebalancing
 
 class PerformanceMetrics(BaseModel):
     CAGR_pct: float
@@ -158,3 +162,118 @@ class AnalyticsResponse(BaseModel):
     growth_chart: Dict[str, ChartData]
     drawdown_chart: Dict[str, ChartData]
     comparisons: List[str]
+
+class PlanRequest(BaseModel):
+    answers: UserAnswers
+    variant: Variant = Variant.baseline
+    # Passed through to the analytics backtest
+    rebalance: Literal["none", "monthly", "quarterly", "annual", "threshold"] = "monthly"
+    frequency: Literal["monthly", "daily"] = "monthly"
+    drift_band: float = Field(default=0.05, gt=0, lt=1)
+
+class PlanResponse(BaseModel):
+    profile: ProfileResponse
+    weights: WeightsResponse
+    analytics: AnalyticsResponse
+
+class CompactAnalyticsRequest(AnalyticsRequest):
+    max_points: Optional[int] = Field(default=None, ge=3)  # LTTB point budget per series
+    decimals: int = Field(default=4, ge=0, le=10)
+    encoding: Literal["json", "f32"] = "json"  # f32: base64 little-endian float32 per series
+
+class CompactChart(BaseModel):
+    dates: List[str]  # shared by every series
+    series: Optional[Dict[str, List[float]]] = None
+    encoded: Optional[Dict[str, str]] = None
+
+class CompactAnalyticsResponse(BaseModel):
+    portfolios: List[PortfolioAnalysis]
+    growth_chart: CompactChart
+    drawdown_chart: CompactChart
+    comparisons: List[str]
+
+MAX_BATCH_PORTFOLIOS = 5000
+
+class BatchPortfolio(BaseModel):
+    name: Optional[str] = None
+    weights: Dict[str, float]
+
+class BatchAnalyticsRequest(BaseModel):
+    portfolios: List[BatchPortfolio] = Field(min_length=1, max_length=MAX_BATCH_PORTFOLIOS)
+    include_curves: bool = False
+
+class BatchPortfolioResult(BaseModel):
+    name: str
+    weights: Dict[str, float]
+    metrics: PerformanceMetrics
+    growth: Optional[List[float]] = None
+
+class BatchAnalyticsResponse(BaseModel):
+    dates: Optional[List[str]] = None
+    results: List[BatchPortfolioResult]
+
+MAX_PROJECTION_PATHS = 100000
+
+class ProjectionRequest(BaseModel):
+    weights: Dict[str, float]
+    horizon_years: float = Field(gt=0, le=50)  # e.g. the profile's timeline_years
+    n_paths: int = Field(default=10000, ge=100, le=MAX_PROJECTION_PATHS)
+    block_months: int = Field(default=12, ge=1, le=60)  # bootstrap block length
+    initial: float = Field(default=1.0, gt=0)
+    monthly_contribution: float = Field(default=0.0, ge=0)
+    target: Optional[float] = Field(default=None, gt=0)  # wealth goal, same units as `initial`
+    percentiles: List[float] = Field(default=[5, 25, 50, 75, 95], min_length=1, max_length=11)
+    seed: Optional[int] = None
+
+class ProjectionResponse(BaseModel):
+    months: List[int]  # months from today at which the bands are reported
+    bands: Dict[str, List[float]]  # "p5" -> projected wealth at each month
+    final: Dict[str, float]
+    success_probability: Optional[float] = None  # share of paths ending at or above target
+    invested: float
+    n_paths: int
+    history_months: int  # length of the history the paths were resampled from
+
+class JobStatus(BaseModel):
+    id: str
+    status: Literal["queued", "running", "completed", "failed"]
+    filename: str
+    input_file: str
+    variant: Variant
+    total: int
+    succeeded: int
+    failed: int
+    processed: int
+    progress: float  # processed / total
+    elapsed_seconds: float  # time spent running, summed over resumes
+    records_per_min: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+class FrontierRequest(BaseModel):
+    user_weights: Optional[Dict[str, float]] = None
+    step: int = Field(default=1, ge=1, le=50)  # grid resolution in percent; must divide 100
+    risk: Literal["vol", "max_dd"] = "vol"  # risk measure the frontier minimizes
+    include_grid: bool = False  # also return metrics of every grid mix (for a scatter plot)
+
+class FrontierPoint(BaseModel):
+    weights: Dict[str, float]
+    CAGR_pct: float
+    Vol_ann_pct: float
+    MaxDD_pct: float
+
+class UserFrontierPosition(BaseModel):
+    point: FrontierPoint
+    efficient: bool  # no grid mix has at most the same risk and a higher CAGR
+    best_at_same_risk: FrontierPoint  # highest-CAGR frontier mix with risk <= the user's
+    share_dominating: float  # fraction of grid mixes with lower-or-equal risk and higher CAGR
+
+class FrontierResponse(BaseModel):
+    data_version: Optional[str] = None
+    grid_size: int
+    frontier: List[FrontierPoint]  # ordered by increasing risk
+    user: Optional[UserFrontierPosition] = None
+    grid: Optional[Dict[str, List[float]]] = None  # column-wise: one list per sleeve plus CAGR_pct/Vol_ann_pct/MaxDD_pct
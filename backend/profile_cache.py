@@ -0,0 +1,163 @@
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+PROFILE_CACHE_SIZE = int(os.environ.get("PROFILE_CACHE_SIZE", "1024"))
+PROFILE_CACHE_TTL = float(os.environ.get("PROFILE_CACHE_TTL", str(7 * 24 * 3600)))
+PROFILE_CACHE_DB = os.environ.get("PROFILE_CACHE_DB") or None  # unset = memory only
+
+
+def normalize_answer(text: str) -> str:
+    """Canonical form of a free-text answer used for cache keys"""
+    text = text.replace("’", "'").replace("‘", "'").replace("–", "-")
+    return " ".join(text.lower().split())
+
+
+def make_key(answers, model: str, version: str) -> str:
+    """Stable key over normalized answers, model name and prompt/schema version"""
+    payload = json.dumps([
+        version, model,
+        normalize_answer(answers.answer1),
+        normalize_answer(answers.answer2),
+        normalize_answer(answers.answer3),
+    ])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ProfileCache:
+    """Exact-match cache of validated RiskProfile dicts.
+
+    In-memory LRU with TTL, optionally backed by a SQLite file so entries
+    survive restarts. Memory misses fall through to disk and are promoted.
+    On the event loop use aget()/aset(), which run the SQLite tier in a
+    worker thread; get()/set() do the same work on the calling thread.
+    """
+
+    def __init__(self, max_entries: int = PROFILE_CACHE_SIZE, ttl: float = PROFILE_CACHE_TTL,
+                 db_path: Optional[str] = PROFILE_CACHE_DB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()     # memory tier and stats; never held during disk I/O
+        self._db_lock = threading.Lock()  # the SQLite connection
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS profile_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM profile_cache WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self._get_memory(key)
+        if value is None and self._db is not None:
+            value = self._get_disk(key)
+        return self._counted(value)
+
+    async def aget(self, key: str) -> Optional[dict]:
+        value = self._get_memory(key)
+        if value is None and self._db is not None:
+            value = await asyncio.to_thread(self._get_disk, key)
+        return self._counted(value)
+
+    def set(self, key: str, value: dict):
+        expires_at = self._set_memory(key, value)
+        if self._db is not None:
+            self._set_disk(key, value, expires_at)
+
+    async def aset(self, key: str, value: dict):
+        expires_at = self._set_memory(key, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._set_disk, key, value, expires_at)
+
+    def _get_memory(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at >= time.time():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return dict(value)
+            del self._entries[key]
+            self._stats["expirations"] += 1
+            return None
+
+    def _get_disk(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM profile_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] < now:
+                self._db.execute("DELETE FROM profile_cache WHERE key = ?", (key,))
+                self._db.commit()
+        if row is None:
+            return None
+        with self._lock:
+            if row[1] < now:
+                self._stats["expirations"] += 1
+                return None
+            value = json.loads(row[0])
+            self._put(key, value, row[1])
+            self._stats["hits"] += 1
+            self._stats["disk_hits"] += 1
+            return dict(value)
+
+    def _counted(self, value: Optional[dict]) -> Optional[dict]:
+        if value is None:
+            with self._lock:
+                self._stats["misses"] += 1
+        return value
+
+    def _set_memory(self, key: str, value: dict) -> float:
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._put(key, dict(value), expires_at)
+        return expires_at
+
+    def _set_disk(self, key: str, value: dict, expires_at: float):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO profile_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+            self._db.commit()
+
+    def _put(self, key: str, value: dict, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM profile_cache")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "persistent": self._db is not None,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
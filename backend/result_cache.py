@@ -0,0 +1,89 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+ANALYTICS_CACHE_SIZE = int(os.environ.get("ANALYTICS_CACHE_SIZE", "256"))
+ANALYTICS_CACHE_BYTES = int(os.environ.get("ANALYTICS_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+
+def make_etag(request: dict, version: Optional[str]) -> str:
+    """Strong validator over a canonical request (sorted keys, no whitespace) and the data version"""
+    payload = json.dumps([version, request], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/").strip('"') == etag:
+            return True
+    return False
+
+
+class ResultCache:
+    """LRU of serialized JSON responses keyed by ETag.
+
+    Bounded by entry count and by total body size, whichever is hit first;
+    bodies are stored as bytes so a hit skips both the backtest and the
+    response serialization.
+    """
+
+    def __init__(self, max_entries: int = ANALYTICS_CACHE_SIZE, max_bytes: int = ANALYTICS_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "not_modified": 0}
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return body
+
+    def set(self, key: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = body
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._stats["evictions"] += 1
+
+    def not_modified(self):
+        """Count a conditional request answered with 304 (no lookup needed)"""
+        with self._lock:
+            self._stats["not_modified"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
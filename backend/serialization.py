@@ -0,0 +1,46 @@
+"""
+JSON encoding for the large analytics responses.
+
+Services build these responses from numbers they computed themselves, with
+`model_construct` (no validation). Routes return them wrapped in
+FastJSONResponse, so FastAPI neither re-validates them against
+`response_model` nor walks them with jsonable_encoder; the decorators keep
+their `response_model`, so the OpenAPI schema is unchanged. orjson writes
+float64 NumPy arrays straight from their buffers, so chart series can be
+handed over as arrays instead of lists of Python floats.
+"""
+import json
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, several times slower on long series
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, BaseModel):
+        # Field values in declaration order, as model_dump() would give them
+        return obj.__dict__
+    if isinstance(obj, np.ndarray):
+        # Only reached for non-contiguous or non-float arrays (or without orjson)
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that encodes models, dicts and NumPy arrays with orjson"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
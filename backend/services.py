@@ -5,28 +5,116 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import json
-import requests
-from jsonschema import validate, ValidationError
+import time
+import itertools
+import asyncio
+import hashlib
+import logging
+import threading
+from jsonschema import ValidationError
+from jsonschema.validators import validator_for
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, NamedTuple, AsyncIterator
 
-from get_json import (
-    SCHEMA, call_ollama, composite, choose_weights, 
-    align_weights, explain_mix, compare_sentence, drawdown,
+from risk_core import (
+    SCHEMA, POLICY, composite, choose_weights,
+    align_weights, explain_mix, compare_sentence,
     enum_map_loss, map_liq, map_income, map_knowledge, map_horizon
 )
-from backtest import download_sleeves, cagr, max_drawdown, time_to_recover
+from monte_carlo import project
+from frontier import sweep, pareto_front
+from rebalancing import rebalanced_returns
+from metrics_engine import compute_metrics, portfolio_returns, drawdowns
+from backtest import download_sleeves
+from market_store import MarketStore, DEFAULT_TICKERS, DEFAULT_START
 from models import *
+from llm_client import LLMDispatcher, LLMOverloaded, PRIORITY_INTERACTIVE, PRIORITY_BULK
+from profile_cache import ProfileCache, make_key
+from result_cache import ResultCache, make_etag
+from charts import compact_series
+from json_repair import partial_json_fields, extract_json_object, coerce_number, missing_required_enums, repair_enums
+from singleflight import Broadcast, SingleFlight
+from jobs import JobManager
+from timings import stage
+from serialization import dumps
+from fast_profiler import fast_profile, FAST_PATH_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+# Bump when create_prompt() changes in a way that should invalidate cached profiles
+PROMPT_VERSION = "1"
+
+# Monte Carlo paths simulated at a time; bounds memory to about MC_CHUNK_PATHS x horizon x 16 bytes
+MC_CHUNK_PATHS = int(os.environ.get("MC_CHUNK_PATHS", "2000"))
+
+# Built once; jsonschema.validate() would re-check the schema and build a validator per call
+SCHEMA_VALIDATOR = validator_for(SCHEMA)(SCHEMA)
+
+# Send SCHEMA as Ollama's `format` (structured outputs, Ollama >= 0.5) instead of plain "json"
+LLM_STRUCTURED_OUTPUT = os.environ.get("LLM_STRUCTURED_OUTPUT", "1") != "0"
+
+# Comparison portfolios shown next to "Your Mix" by /analytics
+COMPARISON_VARIANTS = {"Defensive": "defensive", "Aggressive": "aggressive"}
+FIXED_COMPARISONS = {
+    "60/40": {"equity": 0.60, "bonds": 0.40, "cash": 0.0},
+    "All Equity": {"equity": 1.0, "bonds": 0.0, "cash": 0.0}
+}
+
+# Market data older than this is served stale while a background refresh runs
+MARKET_DATA_TTL = float(os.environ.get("MARKET_DATA_TTL", str(24 * 3600)))
+# After a failed refresh, wait this long before trying again
+MARKET_DATA_RETRY = float(os.environ.get("MARKET_DATA_RETRY", "300"))
+# "worker": API processes download/refresh the shared store themselves, one at a time;
+# "external": only `python market_store.py refresh --every N` writes it, workers just attach
+MARKET_DATA_LOADER = os.environ.get("MARKET_DATA_LOADER", "worker")
+# Seconds between checks for a snapshot published by another process
+MARKET_DATA_POLL = float(os.environ.get("MARKET_DATA_POLL", "5"))
+
+class AnalyzedPortfolio(NamedTuple):
+    """One backtested portfolio: its response model plus the raw chart arrays"""
+    analysis: PortfolioAnalysis
+    dates: List[str]
+    growth: np.ndarray
+    drawdown: np.ndarray
+
+    @property
+    def growth_chart(self) -> ChartData:
+        return ChartData.model_construct(dates=self.dates, values=self.growth.tolist())
+
+    @property
+    def drawdown_chart(self) -> ChartData:
+        return ChartData.model_construct(dates=self.dates, values=self.drawdown.tolist())
 
 class RiskProfilerService:
     def __init__(self):
-        self.tickers = {
-            "equity": "NIFTYBEES.NS",
-            "bonds": "NETFLTGILT.NS", 
-            "cash": "LIQUIDBEES.NS"
-        }
+        self.tickers = dict(DEFAULT_TICKERS)
+        self.market_store = MarketStore()
         self._cached_data = None
+        self._comparisons = None
+        self.data_version = None
+        self._data_refreshed_at = 0.0
+        self._retry_refresh_at = 0.0
+        self._next_store_check = 0.0
+        self._load_lock = threading.Lock()      # single-flight initial load
+        self._refresh_lock = threading.Lock()   # single-flight background refresh
+        self._frontier_lock = threading.Lock()  # single-flight grid sweeps
+        self._frontiers = {}                    # step -> sweep, for the current data only
+        self.last_refresh_error = None
+        self.llm = LLMDispatcher.from_env()
+        self.profile_cache = ProfileCache()
+        self.analytics_cache = ResultCache()   # serialized /analytics responses by ETag
+        self._profile_flights = SingleFlight()
+        self._profile_streams: Dict[str, Broadcast] = {}  # flight key -> events of a streaming generation
+        self.jobs = JobManager(self.profile_record)
+        self.fast_path_threshold = FAST_PATH_THRESHOLD
+        self._fast_path_stats = {"hits": 0, "escalations": 0}
+        # valid: parsed as-is, repaired: fixed locally, retried: re-asked the LLM
+        self._llm_output_stats = {"valid": 0, "repaired": 0, "unrepairable": 0, "retried": 0}
+        # Constrain generation to the schema (Ollama structured outputs) so retries are rare
+        self.llm_format = SCHEMA if LLM_STRUCTURED_OUTPUT else "json"
+        schema_hash = hashlib.sha256(json.dumps(SCHEMA, sort_keys=True).encode()).hexdigest()[:12]
+        self.prompt_version = f"{PROMPT_VERSION}:{schema_hash}"
     
     def create_prompt(self, answers: UserAnswers) -> str:
         """Create LLM prompt from user answers"""
@@ -49,12 +137,9 @@ Now produce the JSON object (no prose, no extra keys).
         # enums/strings
         obj.setdefault("goal", "steady growth")
 
-        # timeline: coerce to float, fallback 5.0
-        v = obj.get("timeline_years")
-        try:
-            obj["timeline_years"] = float(v) if v not in (None, "") else 5.0
-        except Exception:
-            obj["timeline_years"] = 5.0
+        # timeline: coerce to float ("~3 years" -> 3.0), fallback 5.0
+        v = coerce_number(obj.get("timeline_years"))
+        obj["timeline_years"] = v if v is not None else 5.0
 
         # categorical fallbacks (strings)
         if obj.get("loss_aversion") in (None, ""):
@@ -67,36 +152,234 @@ Now produce the JSON object (no prose, no extra keys).
             obj["knowledge_level"] = "novice"
 
         # confidences: ensure dict + numeric defaults
-        conf = obj.get("confidences") or {}
+        conf = obj.get("confidences")
+        conf = conf if isinstance(conf, dict) else {}
         for k, default in (("timeline_years", 3.0), ("loss_aversion", 0.5), ("liquidity_need", 0.5)):
-            try:
-                conf[k] = float(conf.get(k)) if conf.get(k) not in (None, "") else default
-            except Exception:
-                conf[k] = default
+            v = coerce_number(conf.get(k))
+            conf[k] = v if v is not None else default
         obj["confidences"] = conf
 
         return obj
-    def generate_profile(self, answers: UserAnswers) -> ProfileResponse:
-        """Generate risk profile from user answers"""
+    async def generate_profile(self, answers: UserAnswers, priority: int = PRIORITY_INTERACTIVE,
+                               refresh: bool = False) -> ProfileResponse:
+        """Generate risk profile from user answers.
+
+        With `refresh`, skip the profile cache and the rule fast path and ask
+        the LLM (the new answer still replaces the cached one).
+        """
+        with stage("profile", "cache"):
+            cache_key = make_key(answers, self.llm.model, self.prompt_version)
+            cached = None if refresh else await self.profile_cache.aget(cache_key)
+        if cached is not None:
+            return self._build_profile_response(cached)
+        fast = None if refresh else self._fast_path(answers)
+        if fast is not None:
+            return fast
+
+        # Identical answers already being generated share that one generation
+        return await self._profile_flights.do(self._flight_key(cache_key, priority),
+                                              lambda: self._generate_uncached(answers, cache_key, priority))
+
+    @staticmethod
+    def _flight_key(cache_key: str, priority: int) -> str:
+        # Per priority, so an interactive request never waits on a generation queued behind bulk jobs
+        return f"{cache_key}:{priority}"
+
+    async def _generate_uncached(self, answers: UserAnswers, cache_key: str,
+                                 priority: int = PRIORITY_INTERACTIVE,
+                                 broadcast: Optional[Broadcast] = None) -> ProfileResponse:
         prompt = self.create_prompt(answers)
         
         try:
-            # Call LLM using the same function from get_json.py
-            raw = call_ollama(prompt)
-            obj = json.loads(raw)
-            obj=self._normalize_llm_obj(obj)
-            validate(instance=obj, schema=SCHEMA)
+            # Same prompt/retry logic as get_json.py, but without blocking the event loop
+            with stage("profile", "llm"):
+                raw = await self._llm_output(prompt, priority, broadcast)
+            obj = self._validated_obj(raw)
         except (json.JSONDecodeError, ValidationError) as e:
-            # Retry once if validation fails (same logic as get_json.py)
-            retry_prompt = prompt + f"\nPrevious output failed schema validation: {e}. Return ONLY corrected JSON.\n json.dumps(SCHEMA)"
-            raw = call_ollama(retry_prompt)
-            obj = json.loads(raw)
-            obj=self._normalize_llm_obj(obj)
-            validate(instance=obj, schema=SCHEMA)
+            # Retry once if local repair could not fix the output (same logic as get_json.py)
+            self._llm_output_stats["retried"] += 1
+            if broadcast is not None:
+                broadcast.publish("progress", {"stage": "retrying", "chars": len(raw)})
+            with stage("profile", "llm"):
+                raw = await self.llm.generate(self._retry_prompt(prompt, e), format=self.llm_format,
+                                              priority=priority)
+            obj = self._validated_obj(raw)
         except Exception as e:
-            # If Ollama fails, provide a more helpful error
-            raise Exception(f"Failed to connect to Ollama service: {str(e)}. Make sure Ollama is running on localhost:11434 with the 'risk-profiler' model.")
+            raise self._llm_error(e)
         
+        result = self._build_profile_response(obj)
+        await self.profile_cache.aset(cache_key, result.profile.model_dump(mode="json"))
+        return result
+
+    async def _llm_output(self, prompt: str, priority: int, broadcast: Optional[Broadcast]) -> str:
+        """LLM text for `prompt`; streamed when someone is watching, publishing progress and partial fields"""
+        if broadcast is None:
+            return await self.llm.generate(prompt, format=self.llm_format, priority=priority)
+        raw = ""
+        fields = {}
+        async for chunk in self.llm.generate_stream(prompt, format=self.llm_format, priority=priority):
+            raw += chunk
+            broadcast.publish("progress", {"stage": "generating", "chars": len(raw)})
+            parsed = partial_json_fields(raw)
+            if len(parsed) > len(fields):
+                broadcast.publish("partial", {k: v for k, v in parsed.items() if k not in fields})
+                fields = parsed
+        return raw
+
+    async def stream_profile(self, answers: UserAnswers) -> AsyncIterator[Tuple[str, Any]]:
+        """Generate a profile, yielding (event, data) pairs as the LLM streams.
+
+        Events: "progress" ({"stage", "chars"}), "partial" (newly completed
+        top-level fields of the JSON being generated) and finally "result"
+        (the validated ProfileResponse).
+
+        The streaming generation is the single-flight task for these answers,
+        so identical /profile and /profile/stream requests join it; streams
+        that join late get the events so far replayed. Leaving the stream
+        cancels the generation only if nobody else is waiting for it.
+        """
+        cache_key = make_key(answers, self.llm.model, self.prompt_version)
+        cached = await self.profile_cache.aget(cache_key)
+        if cached is not None:
+            yield "result", self._build_profile_response(cached)
+            return
+        fast = self._fast_path(answers)
+        if fast is not None:
+            yield "result", fast
+            return
+
+        flight_key = self._flight_key(cache_key, PRIORITY_INTERACTIVE)
+        new = self._profile_flights.in_flight(flight_key) is None
+        if new:
+            # Reject before the response starts streaming if the LLM queue is full
+            self.llm.check_capacity()
+            broadcast = Broadcast()
+            broadcast.publish("progress", {"stage": "generating", "chars": 0})
+        else:
+            # None if a non-streaming /profile started it: no chunks to show, just wait
+            broadcast = self._profile_streams.get(flight_key)
+
+        with self._profile_flights.join(
+                flight_key, lambda: self._generate_uncached(answers, cache_key, broadcast=broadcast)) as task:
+            if new:
+                self._profile_streams[flight_key] = broadcast
+                task.add_done_callback(lambda _: self._end_stream(flight_key, broadcast))
+            if broadcast is None:
+                yield "progress", {"stage": "waiting", "chars": 0}
+                yield "result", await asyncio.shield(task)
+                return
+
+            queue = broadcast.subscribe()
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        break
+                    yield item
+                result = await asyncio.shield(task)
+            finally:
+                broadcast.unsubscribe(queue)
+                if not task.done() and self._profile_flights.waiters(task) == 1:
+                    # Client went away and no other request shares this generation
+                    task.cancel()
+            yield "result", result
+
+    def _end_stream(self, flight_key: str, broadcast: Broadcast):
+        if self._profile_streams.get(flight_key) is broadcast:
+            del self._profile_streams[flight_key]
+        broadcast.close()
+
+    async def profile_record(self, record: dict, variant: str) -> dict:
+        """One bulk-job record: fresh LLM profile at bulk priority, then weights for `variant`"""
+        answers = UserAnswers(**{k: record.get(k) for k in ("answer1", "answer2", "answer3")})
+        # Jobs re-profile after a model or prompt change, so neither cached nor rule results will do
+        result = await self.generate_profile(answers, priority=PRIORITY_BULK, refresh=True)
+        weights = self.calculate_weights(WeightsRequest(label=result.label, variant=variant, axes=result.axes))
+        return {
+            "label": result.label,
+            "score": result.score,
+            "axes": result.axes,
+            "profile": result.profile.model_dump(mode="json"),
+            "weights": weights.weights,
+            "explanations": weights.explanations,
+        }
+
+    def _fast_path(self, answers: UserAnswers) -> Optional[ProfileResponse]:
+        """Rule-based profile when the rules are confident enough, else None (use the LLM)"""
+        with stage("profile", "fast_path"):
+            obj = fast_profile(answers, self.fast_path_threshold)
+        if obj is None:
+            self._fast_path_stats["escalations"] += 1
+            return None
+        self._fast_path_stats["hits"] += 1
+        return self._build_profile_response(obj)
+
+    def profile_stats(self) -> dict:
+        return {
+            "fast_path": {**self._fast_path_stats, "threshold": self.fast_path_threshold},
+            "llm_output": dict(self._llm_output_stats),
+            "profile_cache": self.profile_cache.stats(),
+            "profile_singleflight": self._profile_flights.stats(),
+            "llm_queue": self.llm.stats(),
+            "analytics_cache": self.analytics_cache.stats(),
+        }
+
+    def _validated_obj(self, raw: str) -> dict:
+        """Parse, normalize and validate LLM output, repairing common defects locally.
+
+        Raises JSONDecodeError/ValidationError only if the repaired output
+        is still unusable (including output cut off before every required
+        enum field was given), in which case the caller re-asks the LLM.
+        """
+        repaired = False
+        with stage("profile", "parse"):
+            try:
+                obj = json.loads(raw)
+            except json.JSONDecodeError:
+                obj = extract_json_object(raw)
+                if obj is None:
+                    self._llm_output_stats["unrepairable"] += 1
+                    raise
+                # Truncated output: defaults must not stand in for the answers the LLM never gave
+                missing = missing_required_enums(obj, SCHEMA)
+                if missing:
+                    self._llm_output_stats["unrepairable"] += 1
+                    raise ValidationError(f"Output is incomplete, missing {', '.join(missing)}")
+                repaired = True
+        if isinstance(obj, list) and obj and isinstance(obj[0], dict):
+            obj, repaired = obj[0], True
+        if not isinstance(obj, dict):
+            self._llm_output_stats["unrepairable"] += 1
+            raise ValidationError(f"Expected a JSON object, got {type(obj).__name__}")
+        with stage("profile", "validate"):
+            obj = self._normalize_llm_obj(obj)
+            if not SCHEMA_VALIDATOR.is_valid(obj):
+                obj = repair_enums(obj, SCHEMA)
+                repaired = True
+                try:
+                    SCHEMA_VALIDATOR.validate(obj)
+                except ValidationError:
+                    self._llm_output_stats["unrepairable"] += 1
+                    raise
+        self._llm_output_stats["repaired" if repaired else "valid"] += 1
+        return obj
+
+    def _retry_prompt(self, prompt: str, error: Exception) -> str:
+        return prompt + f"\nPrevious output failed schema validation: {error}. Return ONLY corrected JSON.\n json.dumps(SCHEMA)"
+
+    def _llm_error(self, e: Exception) -> Exception:
+        if isinstance(e, LLMOverloaded):
+            return e
+        if isinstance(e, asyncio.TimeoutError):
+            return Exception(f"Ollama did not finish generating within {self.llm.timeout:.0f}s. The model may be overloaded.")
+        # If Ollama fails, provide a more helpful error
+        return Exception(f"Failed to connect to Ollama service: {str(e)}. Make sure Ollama is running on {self.llm.base_url} with the '{self.llm.model}' model.")
+
+    def _build_profile_response(self, obj: dict) -> ProfileResponse:
+        with stage("profile", "build"):
+            return self._profile_response(obj)
+
+    def _profile_response(self, obj: dict) -> ProfileResponse:
         # Create profile object
         profile = RiskProfile(**obj)
         
@@ -121,7 +404,8 @@ Now produce the JSON object (no prose, no extra keys).
     
     def calculate_weights(self, request: WeightsRequest) -> WeightsResponse:
         """Calculate investment weights with guardrails"""
-        weights = choose_weights(request.label, request.variant.value, request.axes)
+        with stage("weights", "policy"):
+            weights = choose_weights(request.label, request.variant.value, request.axes)
         
         # Generate explanations for guardrails
         explanations = []
@@ -140,57 +424,319 @@ Now produce the JSON object (no prose, no extra keys).
         if not explanations:
             explanations.append("Using baseline allocation with no significant adjustments needed")
         
-        return WeightsResponse(
-            weights=weights,
-            explanations=explanations
-        )
+        with stage("weights", "build"):
+            return WeightsResponse(
+                weights=weights,
+                explanations=explanations
+            )
     
+    def _load_prices(self) -> pd.DataFrame:
+        """Load prices from the local store, downloading (and storing) them only if it is empty"""
+        prices = self.market_store.load(self.tickers)
+        if prices is None:
+            if MARKET_DATA_LOADER == "external":
+                raise ValueError("Market data store is empty - run: python market_store.py refresh")
+            with self.market_store.lock():
+                # Another worker may have filled the store while this one waited
+                prices = self.market_store.load(self.tickers)
+                if prices is None:
+                    prices = download_sleeves(self.tickers, start=DEFAULT_START)
+                    self.market_store.save(prices, self.tickers, DEFAULT_START)
+                    prices = self.market_store.load(self.tickers)
+        return prices
+
+    def _set_market_data(self, prices: pd.DataFrame):
+        """Precompute monthly returns and swap them in as the current data"""
+        # Memory-mapped from the store snapshot, so all workers share one copy
+        rets, daily_rets = self.market_store.load_returns(prices)
+        comparisons = self._precompute_comparisons(rets)
+        # Single assignments, so readers see either the old or the new data
+        self._comparisons = (rets, comparisons, daily_rets)
+        self._frontiers = {}
+        self._cached_data = rets
+        self.data_version = prices.attrs.get("version")
+        # ETags include the version, so old entries could never be hit again
+        self.analytics_cache.clear()
+        self._data_refreshed_at = self.market_store.updated_at() or time.time()
+
+    @property
+    def is_ready(self) -> bool:
+        return self._cached_data is not None
+
+    def data_age(self) -> Optional[float]:
+        return time.time() - self._data_refreshed_at if self.is_ready else None
+
+    def warm_up(self):
+        """Load and precompute market data at startup, then refresh it if stale"""
+        self._get_market_data()
+        logger.info(f"Market data ready (version {self.data_version}, {len(self._cached_data)} months)")
+
+    def _store_is_stale(self) -> bool:
+        return time.time() - (self.market_store.updated_at() or 0.0) > MARKET_DATA_TTL
+
+    def refresh_market_data(self) -> bool:
+        """Bring the shared store up to date if needed and swap in its latest snapshot.
+
+        Single-flight: returns False immediately if a refresh is already running.
+        Across processes the store lock makes one worker refresh while the
+        others wait and then attach to what it wrote.
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            if MARKET_DATA_LOADER != "external" and self._store_is_stale():
+                with self.market_store.lock():
+                    if self._store_is_stale():
+                        self.market_store.refresh(self.tickers, start=DEFAULT_START)
+            prices = self.market_store.load(self.tickers)
+            if prices is None:
+                raise ValueError("Market data store is empty")
+            if prices.attrs.get("version") == self.data_version:
+                self._data_refreshed_at = self.market_store.updated_at() or time.time()
+            else:
+                self._set_market_data(prices)
+                logger.info(f"Market data refreshed to version {self.data_version}")
+            self.last_refresh_error = None
+            return True
+        except Exception as e:
+            # Keep serving the stale data; retry after a back-off
+            self.last_refresh_error = str(e)
+            self._retry_refresh_at = time.time() + MARKET_DATA_RETRY
+            logger.error(f"Market data refresh failed: {e}")
+            return False
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh_in_background(self):
+        if self._refresh_lock.locked():
+            return
+        threading.Thread(target=self.refresh_market_data, name="market-data-refresh", daemon=True).start()
+
+    def _store_changed(self, now: float) -> bool:
+        """True when another process published a new snapshot (checked every MARKET_DATA_POLL seconds)"""
+        if now < self._next_store_check:
+            return False
+        self._next_store_check = now + MARKET_DATA_POLL
+        version = self.market_store.current_version()
+        return version is not None and version != self.data_version
+
     def _get_market_data(self) -> pd.DataFrame:
         """Get or cache market data"""
         if self._cached_data is None:
-            prices = download_sleeves(self.tickers, start="2014-01-01")
-            mclose = prices.resample("ME").last()
-            self._cached_data = mclose.pct_change().dropna()
+            # Concurrent first requests wait for one load instead of each downloading
+            with self._load_lock:
+                if self._cached_data is None:
+                    self._set_market_data(self._load_prices())
+        now = time.time()
+        stale = MARKET_DATA_LOADER != "external" and now - self._data_refreshed_at > MARKET_DATA_TTL
+        if (stale and now >= self._retry_refresh_at) or self._store_changed(now):
+            # Stale-while-revalidate: answer from current data, refresh (or attach) behind it
+            self._refresh_in_background()
         
         return self._cached_data
     
-    def run_analytics(self, request: AnalyticsRequest) -> AnalyticsResponse:
-        """Run backtesting analytics"""
-        rets = self._get_market_data()
+    @staticmethod
+    def _performance_metrics(m: dict, j: int) -> PerformanceMetrics:
+        """PerformanceMetrics for column j of a metrics_engine.compute_metrics result"""
+        # Built from our own numbers, so response models here skip validation (model_construct)
+        return PerformanceMetrics.model_construct(
+            CAGR_pct=round(float(m["cagr"][j]) * 100, 2),
+            Vol_ann_pct=round(float(m["vol_ann"][j]) * 100, 2),
+            MaxDD_pct=round(float(m["max_dd"][j]) * 100, 2),
+            Worst_12m_pct=round(float(m["worst_window"][j]) * 100, 2),
+            Recovery_m=int(m["recovery_m"][j]) or None
+        )
+
+    def run_batch_analytics(self, request: BatchAnalyticsRequest) -> BatchAnalyticsResponse:
+        """Backtest many weight vectors at once with a single returns x weights product"""
+        with stage("batch", "data"):
+            rets = self._get_market_data()
         
         if rets.empty:
             raise ValueError("Empty returns data - check ticker dates")
         
-        # Define comparison portfolios
-        compare_portfolios = {
-            "Your Mix": request.user_weights,
-            "Defensive": choose_weights(request.label, "defensive", request.axes),
-            "Aggressive": choose_weights(request.label, "aggressive", request.axes),
-            "60/40": {"equity": 0.60, "bonds": 0.40, "cash": 0.0},
-            "All Equity": {"equity": 1.0, "bonds": 0.0, "cash": 0.0}
-        }
+        unknown = {k for p in request.portfolios for k in p.weights} - set(rets.columns)
+        if unknown:
+            raise ValueError(f"Unknown asset classes in weights: {sorted(unknown)}")
+
+        with stage("batch", "backtest"):
+            W = np.array([[p.weights.get(c, 0.0) for c in rets.columns] for p in request.portfolios]).T
+            m = compute_metrics(portfolio_returns(rets.values, W), rets.index)
         
-        # Run backtests
-        portfolios = []
-        curves = {}
-        growth_chart_data = {}
-        drawdown_chart_data = {}
-        
-        for name, weights in compare_portfolios.items():
-            # Align weights and calculate returns
-            wts_aligned = align_weights(weights, rets.columns)
-            port_rets = rets.dot(wts_aligned)
-            curve = (1 + port_rets).cumprod()
-            curves[name] = curve
-            
-            # Calculate metrics
-            metrics = PerformanceMetrics(
-                CAGR_pct=round(cagr(curve) * 100, 2),
-                Vol_ann_pct=round(port_rets.std() * np.sqrt(12) * 100, 2),
-                MaxDD_pct=round(max_drawdown(curve) * 100, 2),
-                Worst_12m_pct=round(port_rets.rolling(12).apply(lambda x: np.prod(1+x)-1).min() * 100, 2),
-                Recovery_m=time_to_recover(curve)
+        with stage("batch", "build"):
+            curves = m["curves"].T.tolist() if request.include_curves else None
+            results = [
+                BatchPortfolioResult.model_construct(
+                    name=p.name or f"Portfolio {j + 1}",
+                    weights=p.weights,
+                    metrics=self._performance_metrics(m, j),
+                    growth=curves[j] if curves else None
+                )
+                for j, p in enumerate(request.portfolios)
+            ]
+            return BatchAnalyticsResponse.model_construct(
+                dates=rets.index.strftime("%Y-%m").tolist() if request.include_curves else None,
+                results=results
+            )
+
+    def run_projection(self, request: ProjectionRequest) -> ProjectionResponse:
+        """Block-bootstrap the monthly history forward and report wealth percentiles"""
+        with stage("projection", "data"):
+            rets = self._get_market_data()
+
+        if rets.empty:
+            raise ValueError("Empty returns data - check ticker dates")
+
+        unknown = set(request.weights) - set(rets.columns)
+        if unknown:
+            raise ValueError(f"Unknown asset classes in weights: {sorted(unknown)}")
+        if any(not 0 < q < 100 for q in request.percentiles):
+            raise ValueError("Percentiles must be between 0 and 100")
+
+        with stage("projection", "simulate"):
+            port_rets = portfolio_returns(rets.values, align_weights(request.weights, rets.columns).values)[:, 0]
+            result = project(
+                port_rets,
+                horizon=max(1, round(request.horizon_years * 12)),
+                n_paths=request.n_paths,
+                block=request.block_months,
+                initial=request.initial,
+                contribution=request.monthly_contribution,
+                target=request.target,
+                percentiles=request.percentiles,
+                seed=request.seed,
+                chunk_paths=MC_CHUNK_PATHS,
             )
+
+        with stage("projection", "build"):
+            return ProjectionResponse.model_construct(
+                months=result["months"].tolist(),
+                bands={f"p{q:g}": band.tolist() for q, band in result["bands"].items()},
+                final={f"p{q:g}": float(v) for q, v in result["final"].items()},
+                success_probability=result["success_probability"],
+                invested=float(result["invested"]),
+                n_paths=request.n_paths,
+                history_months=len(rets),
+            )
+
+    def _frontier_sweep(self, rets: pd.DataFrame, step: int) -> dict:
+        """Grid sweep, computed once per step and market data version (shared by both risk measures)"""
+        # Captured before computing: a data swap replaces the dict, so stale results are never stored
+        frontiers = self._frontiers
+        grid = frontiers.get(step)
+        if grid is None:
+            with self._frontier_lock:
+                grid = frontiers.get(step)
+                if grid is None:
+                    grid = sweep(rets.values, rets.index, step)
+                    grid["fronts"] = {}
+                    frontiers[step] = grid
+        return grid
+
+    @staticmethod
+    def _pareto(grid: dict, risk: str) -> dict:
+        """Risk per mix and the Pareto frontier of a sweep for `risk`, memoized on the sweep"""
+        front = grid["fronts"].get(risk)
+        if front is None:
+            risks = grid["vol_ann"] if risk == "vol" else -grid["max_dd"]
+            front = {"risk": risks, "frontier": pareto_front(grid["cagr"], risks)}
+            # A concurrent request may compute the same front; either copy is identical
+            grid["fronts"][risk] = front
+        return front
+
+    def run_frontier(self, request: FrontierRequest) -> FrontierResponse:
+        """Efficient frontier over every mix on the weight grid, plus where the user's mix sits"""
+        with stage("frontier", "data"):
+            rets = self._get_market_data()
+
+        if rets.empty:
+            raise ValueError("Empty returns data - check ticker dates")
+        if 100 % request.step:
+            raise ValueError("step must divide 100")
+
+        rets = self._comparisons[0]
+        with stage("frontier", "sweep"):
+            grid = self._frontier_sweep(rets, request.step)
+            front = self._pareto(grid, request.risk)
+
+        columns = list(rets.columns)
+
+        def point(weights, cagr, vol_ann, max_dd) -> FrontierPoint:
+            return FrontierPoint.model_construct(
+                weights={c: round(float(w), 4) for c, w in zip(columns, weights)},
+                CAGR_pct=round(float(cagr) * 100, 2),
+                Vol_ann_pct=round(float(vol_ann) * 100, 2),
+                MaxDD_pct=round(float(max_dd) * 100, 2),
+            )
+
+        def grid_point(j) -> FrontierPoint:
+            return point(grid["weights"][:, j], grid["cagr"][j], grid["vol_ann"][j], grid["max_dd"][j])
+
+        with stage("frontier", "build"):
+            user = None
+            if request.user_weights is not None:
+                unknown = set(request.user_weights) - set(columns)
+                if unknown:
+                    raise ValueError(f"Unknown asset classes in weights: {sorted(unknown)}")
+                w = align_weights(request.user_weights, rets.columns).values
+                m = compute_metrics(portfolio_returns(rets.values, w), rets.index)
+                cagr, vol_ann, max_dd = m["cagr"][0], m["vol_ann"][0], m["max_dd"][0]
+                my_risk = vol_ann if request.risk == "vol" else -max_dd
+                dominating = (front["risk"] <= my_risk) & (grid["cagr"] > cagr)
+                efficient = front["frontier"]
+                reachable = efficient[front["risk"][efficient] <= my_risk]
+                best = reachable[-1] if len(reachable) else efficient[0]
+                user = UserFrontierPosition.model_construct(
+                    point=point(w, cagr, vol_ann, max_dd),
+                    efficient=not dominating.any(),
+                    best_at_same_risk=grid_point(best),
+                    share_dominating=round(float(dominating.mean()), 4),
+                )
+
+            if "points" not in front:
+                # The frontier only depends on the grid, so its response models are built once too
+                front["points"] = [grid_point(j) for j in front["frontier"]]
+
+            grid_columns = None
+            if request.include_grid:
+                grid_columns = {c: np.round(grid["weights"][i], 4).tolist() for i, c in enumerate(columns)}
+                grid_columns.update({
+                    "CAGR_pct": np.round(grid["cagr"] * 100, 2).tolist(),
+                    "Vol_ann_pct": np.round(grid["vol_ann"] * 100, 2).tolist(),
+                    "MaxDD_pct": np.round(grid["max_dd"] * 100, 2).tolist(),
+                })
+
+            return FrontierResponse.model_construct(
+                data_version=self.data_version,
+                grid_size=grid["weights"].shape[1],
+                frontier=front["points"],
+                user=user,
+                grid=grid_columns,
+            )
+
+    def _analyze_portfolios(self, rets: pd.DataFrame, dates: List[str], named_weights: List[Tuple[str, dict]],
+                            rebalance: str = "monthly", drift_band: float = 0.05,
+                            periods_per_year: int = 12) -> List["AnalyzedPortfolio"]:
+        """Backtest (name, weights) pairs as one returns x weights product.
+
+        Monthly returns rebalanced monthly are a plain constant mix; any other
+        schedule or daily returns go through rebalancing.rebalanced_returns.
+        """
+        W = np.column_stack([align_weights(w, rets.columns).values for _, w in named_weights])
+        if rebalance == "monthly" and periods_per_year == 12:
+            port_rets = portfolio_returns(rets.values, W)
+        else:
+            port_rets, _ = rebalanced_returns(rets.values, W, rets.index, rebalance, drift_band)
+        # Worst_12m is a 12-month window whatever the data frequency
+        m = compute_metrics(port_rets, rets.index, periods_per_year=periods_per_year, window=periods_per_year)
+        # One contiguous row per portfolio, so each series can be encoded straight from its buffer
+        curves = np.ascontiguousarray(m["curves"].T)
+        dd = np.ascontiguousarray(drawdowns(m["curves"]).T) * 100  # Convert to percentage
+
+        results = []
+        for j, (name, weights) in enumerate(named_weights):
+            # Calculate metrics
+            metrics = self._performance_metrics(m, j)
             
             # Generate explanation
             explanation = explain_mix(name, {
@@ -201,24 +747,94 @@ Now produce the JSON object (no prose, no extra keys).
                 "Recovery_m": metrics.Recovery_m
             })
             
-            portfolios.append(PortfolioAnalysis(
-                name=name,
-                weights=weights,
-                metrics=metrics,
-                explanation=explanation
+            results.append(AnalyzedPortfolio(
+                analysis=PortfolioAnalysis.model_construct(name=name, weights=weights, metrics=metrics,
+                                                           explanation=explanation),
+                dates=dates,
+                growth=curves[j],
+                drawdown=dd[j]
             ))
-            
-            # Prepare chart data
-            dates = [d.strftime("%Y-%m") for d in curve.index]
-            growth_chart_data[name] = ChartData(dates=dates, values=curve.tolist())
-            
-            # Drawdown data
-            dd = drawdown(curve) * 100  # Convert to percentage
-            drawdown_chart_data[name] = ChartData(dates=dates, values=dd.tolist())
+        return results
+
+    def _precompute_comparisons(self, rets: pd.DataFrame) -> dict:
+        """Backtest every comparison portfolio /analytics can show.
+
+        The comparison mixes only depend on (label, variant) and the two
+        choose_weights guardrails, so all reachable combinations are computed
+        once per data version and looked up per request.
+        """
+        if rets.empty:
+            return {}
+        keys, named_weights = [], []
+        for label in POLICY:
+            for name, variant in COMPARISON_VARIANTS.items():
+                for high_liquidity, high_loss_aversion in itertools.product((False, True), repeat=2):
+                    axes = {"liquidity": 1.0 if high_liquidity else 0.0,
+                            "loss_aversion": 1.0 if high_loss_aversion else 0.0}
+                    keys.append((label, variant, high_liquidity, high_loss_aversion))
+                    named_weights.append((name, choose_weights(label, variant, axes)))
+        for name, weights in FIXED_COMPARISONS.items():
+            keys.append(name)
+            named_weights.append((name, dict(weights)))
+
+        dates = [d.strftime("%Y-%m") for d in rets.index]
+        return {"dates": dates, **dict(zip(keys, self._analyze_portfolios(rets, dates, named_weights)))}
+
+    @staticmethod
+    def _guardrail_state(axes: Dict[str, float]) -> Tuple[bool, bool]:
+        # Same thresholds as choose_weights
+        return axes["liquidity"] >= 0.75, axes["loss_aversion"] >= 0.75
+
+    def _collect_analytics(self, request: AnalyticsRequest) -> Tuple[List[str], List["AnalyzedPortfolio"], List[str]]:
+        """Backtest "Your Mix" and look up its comparison portfolios"""
+        with stage("analytics", "data"):
+            rets = self._get_market_data()
+
+        if rets.empty:
+            raise ValueError("Empty returns data - check ticker dates")
+
+        rets, precomputed, daily_rets = self._comparisons
+        if request.rebalance != "monthly" or request.frequency != "monthly":
+            dates, analyzed = self._backtest_with_comparisons(request, rets, daily_rets)
+        else:
+            # Comparison portfolios are precomputed with the data; only "Your Mix" is backtested here
+            guardrails = self._guardrail_state(request.axes)
+            dates = precomputed["dates"]
+            with stage("analytics", "backtest"):
+                analyzed = self._analyze_portfolios(rets, dates, [("Your Mix", request.user_weights)])
+            for variant in COMPARISON_VARIANTS.values():
+                analyzed.append(precomputed[(request.label, variant) + guardrails])
+            for name in FIXED_COMPARISONS:
+                analyzed.append(precomputed[name])
+
+        portfolios = [a.analysis for a in analyzed]
         
         # Generate comparisons
-        comparisons = []
         user_metrics = next(p.metrics for p in portfolios if p.name == "Your Mix")
+        with stage("analytics", "compare"):
+            comparisons = self._compare_to_user(user_metrics, portfolios)
+        return dates, analyzed, comparisons
+
+    def _backtest_with_comparisons(self, request: AnalyticsRequest, rets: pd.DataFrame,
+                                   daily_rets: pd.DataFrame) -> Tuple[List[str], List["AnalyzedPortfolio"]]:
+        """Backtest "Your Mix" and every comparison under the requested schedule and frequency"""
+        if request.frequency == "daily":
+            rets, date_format, periods_per_year = daily_rets, "%Y-%m-%d", 252
+        else:
+            date_format, periods_per_year = "%Y-%m", 12
+        named_weights = [("Your Mix", request.user_weights)]
+        for name, variant in COMPARISON_VARIANTS.items():
+            named_weights.append((name, choose_weights(request.label, variant, request.axes)))
+        named_weights.extend((name, dict(weights)) for name, weights in FIXED_COMPARISONS.items())
+        dates = rets.index.strftime(date_format).tolist()
+        with stage("analytics", "backtest"):
+            analyzed = self._analyze_portfolios(rets, dates, named_weights, request.rebalance,
+                                                request.drift_band, periods_per_year)
+        return dates, analyzed
+
+    @staticmethod
+    def _compare_to_user(user_metrics: PerformanceMetrics, portfolios: List[PortfolioAnalysis]) -> List[str]:
+        comparisons = []
         for portfolio in portfolios:
             if portfolio.name != "Your Mix":
                 comparison = compare_sentence(
@@ -236,10 +852,86 @@ Now produce the JSON object (no prose, no extra keys).
                     }
                 )
                 comparisons.append(comparison)
-        
-        return AnalyticsResponse(
-            portfolios=portfolios,
-            growth_chart=growth_chart_data,
-            drawdown_chart=drawdown_chart_data,
-            comparisons=comparisons
+        return comparisons
+
+    def run_analytics(self, request: AnalyticsRequest) -> AnalyticsResponse:
+        """Run backtesting analytics"""
+        _, analyzed, comparisons = self._collect_analytics(request)
+        with stage("analytics", "build"):
+            return AnalyticsResponse.model_construct(
+                portfolios=[a.analysis for a in analyzed],
+                growth_chart={a.analysis.name: a.growth_chart for a in analyzed},
+                drawdown_chart={a.analysis.name: a.drawdown_chart for a in analyzed},
+                comparisons=comparisons
+            )
+
+    def analytics_json(self, request: AnalyticsRequest) -> bytes:
+        """run_analytics() serialized, with chart values encoded straight from the arrays"""
+        _, analyzed, comparisons = self._collect_analytics(request)
+        with stage("analytics", "build"):
+            return dumps({
+                "portfolios": [a.analysis for a in analyzed],
+                "growth_chart": {a.analysis.name: {"dates": a.dates, "values": a.growth} for a in analyzed},
+                "drawdown_chart": {a.analysis.name: {"dates": a.dates, "values": a.drawdown} for a in analyzed},
+                "comparisons": comparisons,
+            })
+
+    def analytics_etag(self, request: AnalyticsRequest) -> str:
+        """ETag of the /analytics response for `request` on the current market data"""
+        self._get_market_data()
+        return make_etag(request.model_dump(mode="json"), self.data_version)
+
+    def cached_analytics(self, request: AnalyticsRequest) -> Tuple[str, bytes]:
+        """(ETag, serialized AnalyticsResponse), from the result cache when possible"""
+        etag = self.analytics_etag(request)
+        with stage("analytics", "cache"):
+            body = self.analytics_cache.get(etag)
+        if body is not None:
+            return etag, body
+        version = self.data_version
+        body = self.analytics_json(request)
+        # If a refresh swapped the data mid-backtest, do not file the body under either version;
+        # the old ETag stays safe to return since it will never match the new data
+        if self.data_version == version:
+            self.analytics_cache.set(etag, body)
+        return etag, body
+
+    async def plan_json(self, request: PlanRequest) -> bytes:
+        """Profile, weights for `request.variant` and their analytics, serialized as a PlanResponse.
+
+        If market data is not loaded yet it loads in a worker thread while the
+        LLM generates, so the backtest can start as soon as the profile is ready.
+        """
+        loading = None
+        if not self.is_ready:
+            loading = asyncio.ensure_future(asyncio.to_thread(self._get_market_data))
+            # Retrieve a load failure even if the profile fails first
+            loading.add_done_callback(lambda t: t.cancelled() or t.exception())
+        profile = await self.generate_profile(request.answers)
+        weights = self.calculate_weights(WeightsRequest(label=profile.label, variant=request.variant, axes=profile.axes))
+        if loading is not None:
+            with stage("plan", "data_wait"):
+                await loading
+        analytics_request = AnalyticsRequest(
+            user_weights=weights.weights, label=profile.label, axes=profile.axes,
+            rebalance=request.rebalance, frequency=request.frequency, drift_band=request.drift_band
         )
+        # The analytics part comes from (and fills) the /analytics result cache
+        _, analytics = await asyncio.to_thread(self.cached_analytics, analytics_request)
+        return b"".join([b'{"profile":', dumps(profile), b',"weights":', dumps(weights),
+                         b',"analytics":', analytics, b"}"])
+
+    def run_compact_analytics(self, request: CompactAnalyticsRequest) -> CompactAnalyticsResponse:
+        """Same analytics with a shared date axis, optional downsampling and compact encodings"""
+        dates, analyzed, comparisons = self._collect_analytics(request)
+        options = dict(max_points=request.max_points, decimals=request.decimals, encoding=request.encoding)
+        with stage("analytics", "charts"):
+            growth = compact_series(dates, {a.analysis.name: a.growth for a in analyzed}, **options)
+            drawdown = compact_series(dates, {a.analysis.name: a.drawdown for a in analyzed}, **options)
+        with stage("analytics", "build"):
+            return CompactAnalyticsResponse.model_construct(
+                portfolios=[a.analysis for a in analyzed],
+                growth_chart=CompactChart.model_construct(**growth),
+                drawdown_chart=CompactChart.model_construct(**drawdown),
+                comparisons=comparisons
+            )
@@ -0,0 +1,99 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class SingleFlight:
+    """Coalesce concurrent async calls that share a key into one execution.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task. The task is shielded, so a caller
+    that disconnects does not cancel the work for everyone else (and the
+    result still lands in any cache the work writes to).
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self._stats = {"executions": 0, "coalesced": 0}
+
+    def in_flight(self, key: str) -> Optional[asyncio.Task]:
+        return self._inflight.get(key)
+
+    @contextmanager
+    def join(self, key: str, fn: Callable[[], Awaitable]) -> Iterator[asyncio.Task]:
+        """Start or join the work for `key` without awaiting it; yields its task.
+
+        The caller counts as a waiter until the block exits (see waiters()).
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self._stats["executions"] += 1
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self._stats["coalesced"] += 1
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            yield task
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def waiters(self, task: asyncio.Task) -> int:
+        """Callers currently inside join()/do() for `task`"""
+        return self._waiters.get(task, 0)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        with self.join(key, fn) as task:
+            return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved when every waiter has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {**self._stats, "in_flight": len(self._inflight)}
+
+
+class Broadcast:
+    """Fan the events of one in-flight task out to any number of subscribers.
+
+    A subscriber that joins late first receives every event published so
+    far; after close() each subscriber's queue ends with None.
+    """
+
+    def __init__(self):
+        self._history: List[Tuple[str, Any]] = []
+        self._queues: List[asyncio.Queue] = []
+        self.closed = False
+
+    def publish(self, event: str, data: Any):
+        self._history.append((event, data))
+        for queue in self._queues:
+            queue.put_nowait((event, data))
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        for item in self._history:
+            queue.put_nowait(item)
+        if self.closed:
+            queue.put_nowait(None)
+        else:
+            self._queues.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._queues:
+            self._queues.remove(queue)
+
+    def close(self):
+        self.closed = True
+        for queue in self._queues:
+            queue.put_nowait(None)
+        self._queues.clear()
@@ -0,0 +1,94 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Seconds; fine at the low end for validation/scoring, long enough for LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# ("<operation>-<stage>", seconds) recorded while serving the current request, for Server-Timing
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with labels (thread-safe)"""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}     # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *labels: str):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            base = ",".join(f'{k}="{v}"' for k, v in zip(self.labelnames, labels))
+            cumulative = 0
+            for le, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{le}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-2]}")
+            lines.append(f"{self.name}_count{{{base}}} {series[-1]}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("risk_profiler_stage_seconds", "Time spent in each stage of an operation",
+                          ("operation", "stage"))
+REQUEST_SECONDS = Histogram("risk_profiler_request_seconds", "Time to produce an HTTP response (headers)",
+                            ("method", "route", "status"))
+
+
+@contextmanager
+def stage(operation: str, name: str):
+    """Time a block into STAGE_SECONDS and the current request's Server-Timing"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, operation, name)
+        timings = _request_timings.get()
+        if timings is not None:
+            # Qualified, so same-named stages of different operations (e.g. /plan) stay apart
+            timings.append((f"{operation}-{name}", elapsed))
+
+
+def begin_request():
+    """Start collecting stage timings for the current request; returns (timings, token)"""
+    timings = []
+    return timings, _request_timings.set(timings)
+
+
+def end_request(token):
+    _request_timings.reset(token)
+
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    """`name;dur=<ms>` entries, repeated stages (e.g. an LLM retry) summed"""
+    totals: Dict[str, float] = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in totals.items())
+
+
+def render_metrics() -> str:
+    return "\n".join(STAGE_SECONDS.render() + REQUEST_SECONDS.render()) + "\n"
@@ -1,15 +1,47 @@
 # pip install yfinance pandas numpy
-import yfinance as yf, pandas as pd, numpy as np
+import pandas as pd, numpy as np
+import io
+import os
 import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 warnings.filterwarnings("ignore")
 
-def fetch_prices(ticker, start):
+# Metrics live in risk_core; re-exported here for existing imports
+from risk_core import cagr, max_drawdown, time_to_recover
+
+# Base URL of an HTTP price source (e.g. price_server.py) used instead of Yahoo Finance
+PRICE_SOURCE_URL = os.environ.get("PRICE_SOURCE_URL")
+# Seconds before download_sleeves gives up waiting and keeps what it has
+DOWNLOAD_DEADLINE = float(os.environ.get("DOWNLOAD_DEADLINE", "60"))
+# Seconds a sleeve's current ticker gets before its next fallback is started alongside it
+FALLBACK_HEDGE = float(os.environ.get("FALLBACK_HEDGE", "5"))
+
+# Updated ticker mapping with fallbacks
+FALLBACK_TICKERS = {
+    "equity": ["NIFTYBEES.NS", "^NSEI", "INFY.NS", "TCS.NS"],  # Nifty ETF, Nifty Index, or large stocks
+    "bonds": ["NETFLTGILT.NS", "GOLDBEES.NS", "KOTAKBANK.NS"],  # Government bonds or gold/bank as proxy
+    "cash": ["LIQUIDBEES.NS", "ICICIBANK.NS", "HDFC.NS"]  # Liquid fund or stable stocks
+}
+
+def _history(ticker, start, source):
+    if source:
+        import requests
+        r = requests.get(f"{source.rstrip('/')}/prices/{ticker}", params={"start": start}, timeout=30)
+        if r.status_code == 404:
+            return pd.DataFrame()
+        r.raise_for_status()
+        return pd.read_csv(io.StringIO(r.text), index_col=0, parse_dates=True)
+    import yfinance as yf  # heavy import, only paid when we actually download
+    return yf.Ticker(ticker).history(start=start, auto_adjust=True, period="max")
+
+def fetch_prices(ticker, start, source=None):
     """Fetch price data with retry logic and better error handling"""
+    source = source or PRICE_SOURCE_URL
     for i in range(3):
         try:
             print(f"Fetching data for {ticker}...")
-            df = yf.Ticker(ticker).history(start=start, auto_adjust=True, period="max")
+            df = _history(ticker, start, source)
             if df.empty:
                 print(f"No data found for {ticker}")
                 return None
@@ -23,42 +55,107 @@ def fetch_prices(ticker, start):
             time.sleep(1 + i)
     return None
 
-def download_sleeves(ticker_map, start="2014-01-01"):
-    """Download data with fallback tickers and better error handling"""
-    
-    # Updated ticker mapping with fallbacks
-    fallback_tickers = {
-        "equity": ["NIFTYBEES.NS", "^NSEI", "INFY.NS", "TCS.NS"],  # Nifty ETF, Nifty Index, or large stocks
-        "bonds": ["NETFLTGILT.NS", "GOLDBEES.NS", "KOTAKBANK.NS"],  # Government bonds or gold/bank as proxy
-        "cash": ["LIQUIDBEES.NS", "ICICIBANK.NS", "HDFC.NS"]  # Liquid fund or stable stocks
-    }
+def _fetch_all(candidates, start, fetch, deadline, hedge):
+    """Download every sleeve concurrently, hedging slow tickers with their fallbacks.
+
+    candidates maps sleeve -> tickers in order of preference. A sleeve starts
+    with its first ticker; the next one is started when the current ones have
+    all failed or after `hedge` seconds. A ticker is used once every ticker
+    preferred over it has failed, so the result matches a sequential walk
+    down the list unless the deadline passes first (then the best finished
+    download wins). Returns sleeve -> (ticker, frame).
+    """
+    FAILED = object()
+    results = {sleeve: {} for sleeve in candidates}    # sleeve -> {index: frame or FAILED}
+    launched = {sleeve: 0 for sleeve in candidates}
+    next_launch = {}
+    chosen = {}
+    futures = {}
+    now = time.monotonic()
+    end = now + deadline
+    pool = ThreadPoolExecutor(max_workers=sum(len(c) for c in candidates.values()) or 1)
+
+    def launch(sleeve):
+        i = launched[sleeve]
+        futures[pool.submit(fetch, candidates[sleeve][i], start)] = (sleeve, i)
+        launched[sleeve] = i + 1
+        next_launch[sleeve] = time.monotonic() + hedge
+
+    def resolve(sleeve):
+        for i, ticker in enumerate(candidates[sleeve]):
+            frame = results[sleeve].get(i)
+            if frame is None:
+                return False          # a preferred ticker is still pending or not started
+            if frame is not FAILED:
+                chosen[sleeve] = (ticker, frame)
+                return True
+        return True                   # every ticker failed
+
+    try:
+        for sleeve in candidates:
+            if candidates[sleeve]:
+                launch(sleeve)
+        open_sleeves = {s for s in candidates if candidates[s]}
+        while open_sleeves and now < end:
+            pending = [f for f, (s, _) in futures.items() if s in open_sleeves and not f.done()]
+            wake = min([end] + [next_launch[s] for s in open_sleeves if launched[s] < len(candidates[s])])
+            done, _ = wait(pending, timeout=max(0.0, wake - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                sleeve, i = futures[future]
+                try:
+                    frame = future.result()
+                except Exception:
+                    frame = None
+                results[sleeve][i] = frame if frame is not None and not frame.empty else FAILED
+            now = time.monotonic()
+            for sleeve in list(open_sleeves):
+                if resolve(sleeve):
+                    open_sleeves.discard(sleeve)
+                    continue
+                running = any(s == sleeve and not f.done() for f, (s, _) in futures.items())
+                if launched[sleeve] < len(candidates[sleeve]) and (not running or now >= next_launch[sleeve]):
+                    launch(sleeve)
+        for sleeve in open_sleeves:
+            # Deadline passed: settle for the most preferred download that finished
+            for i in sorted(results[sleeve]):
+                if results[sleeve][i] is not FAILED:
+                    chosen[sleeve] = (candidates[sleeve][i], results[sleeve][i])
+                    break
+    finally:
+        # Downloads still running are abandoned, queued ones never start
+        pool.shutdown(wait=False, cancel_futures=True)
+    return chosen
+
+def download_sleeves(ticker_map, start="2014-01-01", fetch=fetch_prices,
+                     deadline=DOWNLOAD_DEADLINE, hedge=FALLBACK_HEDGE):
+    """Download data with fallback tickers and better error handling.
+
+    All sleeves download in parallel; see _fetch_all for how fallbacks are raced.
+    The ticker each sleeve came from ("synthetic" for generated cash) is
+    returned in prices.attrs["sources"].
+    """
+    candidates = {}
+    for sleeve, primary_ticker in ticker_map.items():
+        fallbacks = [t for t in FALLBACK_TICKERS.get(sleeve, []) if t != primary_ticker]
+        candidates[sleeve] = [primary_ticker] + fallbacks
+    print(f"\nFetching {', '.join(candidates)} data...")
+    chosen = _fetch_all(candidates, start, fetch, deadline, hedge)
     
     successful_downloads = {}
-    
+    sources = {}
     for sleeve, primary_ticker in ticker_map.items():
-        print(f"\nTrying to fetch {sleeve} data...")
-        
-        # Try primary ticker first
-        data = fetch_prices(primary_ticker, start)
-        if data is not None and not data.empty:
-            data.columns = [sleeve]
-            successful_downloads[sleeve] = data
-            print(f"✓ Successfully fetched {sleeve} using {primary_ticker}")
-            continue
-        
-        # Try fallback tickers
-        if sleeve in fallback_tickers:
-            for fallback_ticker in fallback_tickers[sleeve]:
-                print(f"  Trying fallback: {fallback_ticker}")
-                data = fetch_prices(fallback_ticker, start)
-                if data is not None and not data.empty:
-                    data.columns = [sleeve]
-                    successful_downloads[sleeve] = data
-                    print(f"✓ Successfully fetched {sleeve} using fallback {fallback_ticker}")
-                    break
-        
-        if sleeve not in successful_downloads:
+        if sleeve not in chosen:
             print(f"✗ Failed to fetch data for {sleeve}")
+            continue
+        ticker, data = chosen[sleeve]
+        data = data.copy()
+        data.columns = [sleeve]
+        successful_downloads[sleeve] = data
+        sources[sleeve] = ticker
+        if ticker == primary_ticker:
+            print(f"✓ Successfully fetched {sleeve} using {ticker}")
+        else:
+            print(f"✓ Successfully fetched {sleeve} using fallback {ticker}")
     
     if not successful_downloads:
         raise ValueError("No market data could be downloaded. Please check your internet connection.")
@@ -72,6 +169,7 @@ def download_sleeves(ticker_map, start="2014-01-01"):
             cash_data = pd.DataFrame(index=sample_data.index, columns=["cash"])
             cash_data["cash"] = (1.005 ** (np.arange(len(cash_data)) / 12)).cumprod()
             successful_downloads["cash"] = cash_data
+            sources["cash"] = "synthetic"
     
     # Combine all successful downloads
     frames = list(successful_downloads.values())
@@ -88,33 +186,8 @@ def download_sleeves(ticker_map, start="2014-01-01"):
     print(f"Assets: {list(prices.columns)}")
     print(f"Data points: {len(prices)}")
     
+    prices.attrs["sources"] = sources
     return prices
-def cagr(curve, periods_per_year=12):
-    n_years = (curve.index[-1] - curve.index[0]).days/365.25
-    return curve.iloc[-1]**(1/n_years)-1
-
-def max_drawdown(curve):
-    peak = curve.cummax()
-    dd = curve/peak - 1.0
-    return dd.min()
-def time_to_recover(curve):
-    # Longest number of months from any peak to when it’s reattained
-    peaks = curve.cummax()
-    longest = 0
-    start_peak = None
-    for i in range(1, len(curve)):
-        if curve.iloc[i] < peaks.iloc[i-1]:
-            # we are below a peak – start timing if not already
-            if start_peak is None:
-                start_peak = peaks.iloc[i-1]
-                start_date = curve.index[i-1]
-        else:
-            # we recovered (>= previous peak)
-            if start_peak is not None:
-                months = (curve.index[i] - start_date).days // 30
-                longest = max(longest, months)
-                start_peak = None
-    return longest if longest > 0 else None
 
 if __name__=="__main__":
     tickers = {
@@ -124,6 +197,8 @@ if __name__=="__main__":
     }
     weights = {"equity":0.60, "bonds":0.35, "cash":0.05}  # e.g., Balanced baseline
 
+    import yfinance as yf
+
     prices = yf.download(list(tickers.values()), start="2007-01-01", auto_adjust=True)["Close"].dropna()
     prices.columns = {v:k for k,v in tickers.items()}  # rename to sleeves
 
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the scoring and backtest core, with a regression gate.
+
+Times risk_core scoring/metric functions, metrics_engine, the Monte Carlo
+projection and the backend analytics service on seeded synthetic returns
+(monthly 10y up to daily 30y, 1 to 1000 portfolios) and compares them with
+saved baselines.
+
+    python bench.py                          # run and print
+    python bench.py --check                  # fail if a case is slower than bench_baseline.json allows
+    python bench.py --save                   # record new baselines (on the machine that runs --check)
+    python bench.py -k analytics --output bench_output.txt
+"""
+import gc
+import os
+import sys
+import json
+import time
+import statistics
+import argparse
+import platform
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+try:
+    import ctypes
+    _libc = ctypes.CDLL("libc.so.6")
+except (ImportError, OSError):  # not glibc
+    _libc = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# backend modules import each other flat (`from models import *`)
+sys.path.append(os.path.join(ROOT, "backend"))
+
+import metrics_engine as me
+from risk_core import composite, choose_weights, align_weights, cagr, max_drawdown, time_to_recover, drawdown
+
+BASELINE_FILE = os.path.join(ROOT, "bench_baseline.json")
+DEFAULT_THRESHOLD = 0.25
+# Seconds per measured sample; each case is timed as the best of --repeat samples
+MIN_SAMPLE = 0.1
+# Per-call slowdowns below this many seconds are timer and scheduler noise, whatever the ratio
+NOISE_FLOOR = 20e-6
+# A case may be this many times its own recorded sample spread slower before it counts
+# (never less than --threshold), so cases that are noisy by nature do not fail the check
+SPREAD_FACTOR = 3
+
+# name -> (periods, pandas frequency, periods per year)
+SHAPES = {
+    "monthly-10y": (120, "ME", 12),
+    "monthly-30y": (360, "ME", 12),
+    "daily-10y": (2520, "B", 252),
+    "daily-30y": (7560, "B", 252),
+}
+PORTFOLIO_COUNTS = (1, 100, 1000)
+
+PROFILE = {"goal": "down payment", "timeline_years": 3.0, "loss_aversion": "high", "liquidity_need": "high",
+           "income_stability": "stable", "knowledge_level": "intermediate"}
+AXES = {"time_horizon": 0.1, "loss_aversion": 0.75, "liquidity": 1.0, "income_stability": 0.0,
+        "knowledge_caution": 0.5}
+SLEEVES = ["equity", "bonds", "cash"]
+
+
+def synthetic_returns(shape, seed=0):
+    periods, freq, per_year = SHAPES[shape]
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1990-01-31" if freq == "ME" else "1990-01-01", periods=periods, freq=freq)
+    mu, sigma = np.array([0.08, 0.06, 0.04]), np.array([0.15, 0.08, 0.02])
+    values = rng.normal(mu / per_year, sigma / np.sqrt(per_year), (periods, 3))
+    return pd.DataFrame(values, index=dates, columns=SLEEVES)
+
+
+def random_weights(n, seed=1):
+    w = np.random.default_rng(seed).dirichlet(np.ones(len(SLEEVES)), n)
+    return [dict(zip(SLEEVES, row)) for row in w]
+
+
+def measure(fn, min_sample=MIN_SAMPLE, repeat=7):
+    """Per-call seconds of `repeat` samples (timeit-style: loops per sample sized to `min_sample`, GC off)"""
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        loops = 1
+        while True:
+            t0 = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            elapsed = time.perf_counter() - t0
+            if elapsed >= min_sample:
+                break
+            loops *= 10 if elapsed < min_sample / 10 else 2
+        samples = [elapsed / loops]
+        for _ in range(repeat - 1):
+            t0 = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            samples.append((time.perf_counter() - t0) / loops)
+        return samples
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def time_call(fn, min_sample=MIN_SAMPLE, repeat=7):
+    """Best per-call time in seconds"""
+    return min(measure(fn, min_sample, repeat))
+
+
+def spread(samples):
+    """How far the typical sample is above the best one, as a fraction"""
+    return statistics.median(samples) / min(samples) - 1
+
+
+def pin_allocator():
+    """Fix glibc's malloc thresholds for the whole run.
+
+    By default glibc serves large blocks (NumPy arrays over 128 KiB) with
+    fresh mmap()s, each paying page faults, and raises that threshold on
+    the fly depending on what was freed earlier. The same case then runs at
+    two very different speeds depending on what ran before it, in this
+    process or in the calibration.
+    """
+    if _libc is None:
+        return
+    M_TRIM_THRESHOLD, M_MMAP_THRESHOLD = -1, -3
+    _libc.mallopt(M_MMAP_THRESHOLD, 64 * 1024 * 1024)
+    _libc.mallopt(M_TRIM_THRESHOLD, 128 * 1024 * 1024)
+
+
+def calibration_workload():
+    """Fixed mix of interpreter and NumPy work; its time tracks how fast this machine is right now"""
+    total = 0
+    for i in range(20000):
+        total += i % 7
+    a = np.arange(200000, dtype=np.float64)
+    return total + float(np.cumprod(1 + a * 1e-9).sum())
+
+
+STORE_DIR = tempfile.TemporaryDirectory(prefix="bench-market-data-")
+
+
+def make_service(shape):
+    """A RiskProfilerService loaded with synthetic prices instead of the market store"""
+    from services import RiskProfilerService
+    from market_store import MarketStore
+
+    service = RiskProfilerService()
+    # An empty private store: a populated MARKET_DATA_DIR would otherwise be
+    # swapped in (or refreshed from the network) on the first request
+    service.market_store = MarketStore(STORE_DIR.name)
+    prices = (1 + synthetic_returns(shape)).cumprod()
+    service._set_market_data(prices)
+    return service
+
+
+def cases():
+    """Yield (name, zero-argument callable)"""
+    yield "composite", lambda: composite(PROFILE)
+    yield "choose_weights", lambda: choose_weights("Balanced Builder", "baseline", AXES)
+    w = {"equity": 0.6, "bonds": 0.35, "cash": 0.05}
+    yield "align_weights", lambda: align_weights(w, SLEEVES)
+
+    for shape in SHAPES:
+        rets = synthetic_returns(shape)
+        curve = (1 + rets.dot(align_weights(w, rets.columns))).cumprod()
+        yield f"cagr[{shape}]", lambda curve=curve: cagr(curve)
+        yield f"max_drawdown[{shape}]", lambda curve=curve: max_drawdown(curve)
+        yield f"drawdown[{shape}]", lambda curve=curve: drawdown(curve)
+        yield f"time_to_recover[{shape}]", lambda curve=curve: time_to_recover(curve)
+
+    for shape in SHAPES:
+        rets = synthetic_returns(shape)
+        per_year = SHAPES[shape][2]
+        for n in PORTFOLIO_COUNTS:
+            W = np.array([[p[s] for s in SLEEVES] for p in random_weights(n)]).T
+
+            def run(rets=rets, W=W, per_year=per_year):
+                port = me.portfolio_returns(rets.values, W)
+                return me.compute_metrics(port, rets.index, periods_per_year=per_year, window=per_year)
+
+            yield f"compute_metrics[{shape} x{n}]", run
+
+    from rebalancing import rebalanced_returns
+
+    for shape in ("monthly-30y", "daily-30y"):
+        rets = synthetic_returns(shape)
+        W = np.array([[p[s] for s in SLEEVES] for p in random_weights(100)]).T
+        for schedule in ("quarterly", "threshold"):
+            yield f"rebalanced_returns[{shape} x100 {schedule}]", \
+                lambda rets=rets, W=W, schedule=schedule: rebalanced_returns(rets.values, W, rets.index, schedule)
+
+    from frontier import sweep
+
+    rets = synthetic_returns("monthly-30y")
+    yield "frontier_sweep[monthly-30y 1%]", lambda rets=rets: sweep(rets.values, rets.index, step=1)
+
+    from monte_carlo import project
+
+    port = synthetic_returns("monthly-30y").dot(align_weights(w, SLEEVES)).values
+    for n, horizon in ((10000, 36), (10000, 360)):
+        yield f"project[{n}x{horizon}m]", lambda n=n, horizon=horizon: project(port, horizon, n, seed=0)
+
+    from models import AnalyticsRequest, BatchAnalyticsRequest
+
+    request = AnalyticsRequest(user_weights=w, label="Balanced Builder", axes=AXES)
+    for shape in ("daily-10y", "daily-30y"):
+        service = make_service(shape)
+        yield f"run_analytics[{shape}]", lambda service=service: service.run_analytics(request)
+        daily = request.model_copy(update={"frequency": "daily", "rebalance": "threshold"})
+        yield f"run_analytics[{shape} daily threshold]", lambda service=service: service.run_analytics(daily)
+        yield f"analytics_json[{shape} daily threshold]", lambda service=service: service.analytics_json(daily)
+        for n in PORTFOLIO_COUNTS[1:]:
+            batch = BatchAnalyticsRequest(portfolios=[{"weights": p} for p in random_weights(n)])
+            yield f"run_batch_analytics[{shape} x{n}]", \
+                lambda service=service, batch=batch: service.run_batch_analytics(batch)
+
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "processor": platform.processor() or platform.node()}
+
+
+def fmt(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:9.1f} us"
+    return f"{seconds * 1e3:9.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="select", help="only cases whose name contains this substring")
+    parser.add_argument("--save", action="store_true", help=f"write results to {os.path.basename(BASELINE_FILE)}")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a case regressed past its tolerance")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="minimum allowed slowdown vs baseline, as a fraction (default 0.25); noisy "
+                             f"cases get {SPREAD_FACTOR}x their recorded spread, plus {NOISE_FLOOR * 1e6:.0f} us per call")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--no-normalize", dest="normalize", action="store_false",
+                        help="compare raw times instead of scaling by the calibration workload")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+    pin_allocator()
+
+    saved = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            saved = json.load(f)
+        if args.check and saved.get("environment") != environment():
+            print(f"Note: baseline was recorded on {saved.get('environment')}, comparing anyway")
+    baseline = saved.get("results", {})
+    spreads = saved.get("spreads", {})
+
+    def calibrate():
+        # Every ratio is scaled by this: longer samples than the cases, and the median, not a lucky best
+        return statistics.median(measure(calibration_workload, 5 * MIN_SAMPLE, max(args.repeat, 7)))
+
+    before = calibrate()
+    print(f"{'calibration':<50} {fmt(before)}", flush=True)
+    fns, results, new_spreads = {}, {}, {}
+    for name, fn in cases():
+        if args.select and args.select not in name:
+            continue
+        fns[name] = fn
+        samples = measure(fn, repeat=args.repeat)
+        results[name] = min(samples)
+        new_spreads[name] = spread(samples)
+        print(f"{name:<50} {fmt(results[name])}", flush=True)
+    after = calibrate()
+
+    # >1 when the machine is slower than when the baselines were recorded; the slower of the
+    # two calibrations, so a machine that sped up or slowed down mid-run does not fail cases
+    calibration = max(before, after)
+    speed = calibration / saved["calibration"] if args.normalize and saved.get("calibration") else 1.0
+
+    def allowed(name):
+        tolerance = max(args.threshold, SPREAD_FACTOR * spreads.get(name, 0.0))
+        # The calibration is noisier than the cases; let it loosen the limit on a slower
+        # machine but never tighten it below the baseline itself
+        return baseline[name] * max(speed, 1.0) * (1 + tolerance) + NOISE_FLOOR
+
+    lines = [f"{'calibration':<50} {fmt(calibration)}   (machine speed factor {speed:.2f})"]
+    regressions = []
+    for name, fn in fns.items():
+        seconds = results[name]
+        if name in baseline and seconds > allowed(name):
+            # Confirm with a longer measurement before calling it a regression
+            seconds = results[name] = min(seconds, time_call(fn, min_sample=5 * MIN_SAMPLE, repeat=args.repeat * 2))
+        line = f"{name:<50} {fmt(seconds)}"
+        if name in baseline:
+            ratio = seconds / (baseline[name] * speed)
+            line += f"   {ratio:5.2f}x baseline (limit {allowed(name) / (baseline[name] * speed):.2f}x)"
+            if seconds > allowed(name):
+                line += "  REGRESSION"
+                regressions.append(name)
+        lines.append(line)
+    print("\n" + "\n".join(lines), flush=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    if args.save:
+        # Stored at the speed of the existing baselines, so a partial save (-k) stays comparable
+        merged = {**baseline, **{name: seconds / speed for name, seconds in results.items()}}
+        merged_spreads = {**spreads, **{name: round(s, 4) for name, s in new_spreads.items()}}
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment(), "calibration": saved.get("calibration", calibration),
+                       "results": merged, "spreads": merged_spreads}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved {len(results)} baselines to {args.baseline}")
+
+    if args.check:
+        missing = [name for name in results if name not in baseline]
+        if missing:
+            print(f"No baseline for: {', '.join(missing)}")
+        if regressions:
+            print(f"❌ {len(regressions)} case(s) slower than their baseline tolerance: {', '.join(regressions)}")
+            return 1
+        print("✅ No benchmark regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Startup-time regression check for the backend.
+
+Imports the backend entry module in a fresh interpreter with
+`python -X importtime`, prints the slowest imports and fails if the total
+import time exceeds the budget or if a heavy module (plotting, market data
+download) is pulled in at import time.
+
+    python check_startup.py                  # check backend/main.py
+    python check_startup.py --budget-ms 800 --module services
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
+# Modules that must only be imported lazily, where they are actually used
+FORBIDDEN = ("yfinance", "matplotlib", "curl_cffi")
+
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(module):
+    """Return (cumulative_us, [(name, cumulative_us, depth)]) for `import module`.
+
+    Only the subtree of `module` is returned; interpreter startup imports
+    (site, encodings, ...) are not part of the budget.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(BACKEND_DIR), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    # -X importtime prints in post-order: a top-level module's line comes
+    # right after all of its (indented) dependencies
+    pending = []
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if not m:
+            continue
+        _, cum_us, indent, name = m.groups()
+        depth = len(indent) // 2
+        if depth == 0:
+            if name == module:
+                return int(cum_us), pending
+            pending = []
+        else:
+            pending.append((name, int(cum_us), depth))
+    raise RuntimeError(f"No importtime entry found for {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="backend module to import (default: main)")
+    parser.add_argument("--budget-ms", type=float, default=2000.0, help="max total import time in ms")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to show")
+    args = parser.parse_args()
+
+    total_us, rows = measure(args.module)
+    total_ms = total_us / 1000
+
+    print(f"Import of '{args.module}': {total_ms:.1f} ms total (budget {args.budget_ms:.0f} ms)")
+    print("Slowest direct imports (cumulative):")
+    for name, cum, _ in sorted((r for r in rows if r[2] == 1), key=lambda r: -r[1])[:args.top]:
+        print(f"  {cum / 1000:8.1f} ms  {name}")
+
+    failures = []
+    loaded = {name.split(".")[0] for name, _, _ in rows}
+    for mod in FORBIDDEN:
+        if mod in loaded:
+            failures.append(f"'{mod}' is imported at startup; import it lazily where it is used")
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+
+    for f in failures:
+        print(f"❌ {f}")
+    if not failures:
+        print("✅ Startup import check passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
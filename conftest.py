@@ -0,0 +1,34 @@
+"""
+Shared fixtures: a RiskProfilerService on seeded synthetic prices, swapped in
+for the one the FastAPI app serves.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+
+def synthetic_prices(periods=2520):
+    dates = pd.date_range("2010-01-01", periods=periods, freq="B")
+    rng = np.random.default_rng(0)
+    rets = rng.normal([0.0003, 0.0002, 0.0001], [0.01, 0.004, 0.0005], (periods, 3))
+    prices = pd.DataFrame((1 + rets).cumprod(axis=0), index=dates, columns=["equity", "bonds", "cash"])
+    prices.attrs["version"] = "v1"
+    return prices
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    import main
+    from market_store import MarketStore
+
+    service = main.RiskProfilerService()
+    # An empty private store, so nothing is loaded or refreshed behind the synthetic data
+    service.market_store = MarketStore(str(tmp_path))
+    service._set_market_data(synthetic_prices())
+    monkeypatch.setattr(main, "risk_profiler", service)
+    return service
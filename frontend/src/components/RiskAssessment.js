@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useRef, useEffect } from 'react';
 import { Container, Card, Form, Button, Alert, Spinner, Row, Col, ProgressBar } from 'react-bootstrap';
 import { api } from '../services/api';
 
@@ -10,6 +10,11 @@ const RiskAssessment = ({ onProfileGenerated }) => {
   });
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
+  const [partialProfile, setPartialProfile] = useState({});
+  const abortRef = useRef(null);
+
+  // Stop any in-flight generation when leaving the page
+  useEffect(() => () => abortRef.current && abortRef.current.abort(), []);
 
   const questions = [
     {
@@ -47,21 +52,44 @@ const RiskAssessment = ({ onProfileGenerated }) => {
 
     setLoading(true);
     setError('');
+    setPartialProfile({});
+    abortRef.current = new AbortController();
 
     try {
-      const profileData = await api.generateProfile(answers);
+      const profileData = await api.streamProfile(answers, (event, data) => {
+        if (event === 'partial') {
+          setPartialProfile(prev => ({ ...prev, ...data }));
+        }
+      }, abortRef.current.signal);
       onProfileGenerated(profileData);
     } catch (err) {
-      console.error('Error generating profile:', err);
-      setError(
-        err.response?.data?.detail || 
-        'Failed to generate risk profile. Please ensure the Ollama service is running and try again.'
-      );
+      if (err.name === 'AbortError') {
+        setError('Profile generation cancelled.');
+      } else {
+        console.error('Error generating profile:', err);
+        const retryAfter = err.response?.status === 503 && err.response.headers['retry-after'];
+        setError(
+          retryAfter
+            ? `The profile service is busy. Please try again in ${retryAfter} seconds.`
+            : err.response?.data?.detail || err.message ||
+              'Failed to generate risk profile. Please ensure the Ollama service is running and try again.'
+        );
+      }
     } finally {
+      abortRef.current = null;
       setLoading(false);
     }
   };
 
+  const handleCancel = () => {
+    if (abortRef.current) {
+      abortRef.current.abort();
+    }
+  };
+
+  const profileFields = ['goal', 'timeline_years', 'loss_aversion', 'liquidity_need', 'income_stability', 'knowledge_level'];
+  const fieldsReady = profileFields.filter(field => field in partialProfile).length;
+
   const isFormComplete = answers.answer1 && answers.answer2 && answers.answer3;
   const completedAnswers = Object.values(answers).filter(answer => answer.trim() !== '').length;
 
@@ -136,6 +164,20 @@ const RiskAssessment = ({ onProfileGenerated }) => {
                   <small>
                     <strong>Please wait:</strong> We're using AI to analyze your responses and create your personalized risk profile. This may take up to 2 minutes.
                   </small>
+                  <ProgressBar
+                    now={(fieldsReady / profileFields.length) * 100}
+                    label={`${fieldsReady}/${profileFields.length} traits`}
+                    className="mt-2"
+                  />
+                  {partialProfile.loss_aversion && (
+                    <small className="d-block mt-2">
+                      Loss aversion: {partialProfile.loss_aversion.replace('_', ' ')}
+                      {partialProfile.liquidity_need && ` · Liquidity need: ${partialProfile.liquidity_need}`}
+                    </small>
+                  )}
+                  <Button variant="outline-secondary" size="sm" className="mt-2" onClick={handleCancel}>
+                    Cancel
+                  </Button>
                 </Alert>
               )}
             </Card.Body>
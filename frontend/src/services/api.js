@@ -17,18 +17,84 @@ export const api = {
     return response.data;
   },
 
+  // Generate risk profile with live progress (server-sent events over POST).
+  // onEvent(event, data) receives "progress", "partial" and "result" events;
+  // pass an AbortController signal to cancel the generation. Resolves to the
+  // profile and rejects if the stream closes without a "result" event.
+  streamProfile: async (answers, onEvent, signal) => {
+    const response = await fetch(`${API_BASE_URL}/profile/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ answers }),
+      signal,
+    });
+    if (!response.ok) {
+      // Shaped like an axios error so callers can read err.response.data.detail
+      // and, on a 503, the Retry-After header.
+      let data = {};
+      try {
+        data = await response.json();
+      } catch (parseError) {
+        // Non-JSON body (e.g. a proxy error page): keep the status only
+      }
+      const error = new Error(data.detail || `Profile request failed with status ${response.status}`);
+      error.response = {
+        status: response.status,
+        data,
+        headers: { 'retry-after': response.headers.get('Retry-After') },
+      };
+      throw error;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let sep;
+      while ((sep = buffer.indexOf('\n\n')) >= 0) {
+        const block = buffer.slice(0, sep);
+        buffer = buffer.slice(sep + 2);
+        let event = 'message';
+        let data = '';
+        block.split('\n').forEach((line) => {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        });
+        const payload = JSON.parse(data);
+        if (event === 'error') throw new Error(payload.detail);
+        if (event === 'result') result = payload;
+        if (onEvent) onEvent(event, payload);
+      }
+    }
+    if (!result) {
+      throw new Error('The profile stream ended without a result. Please try again.');
+    }
+    return result;
+  },
+
   // Get investment weights
   calculateWeights: async (label, variant, axes) => {
     const response = await apiClient.post('/weights', { label, variant, axes });
     return response.data;
   },
 
-  // Run backtesting analytics
+  // Profile, weights for `variant` and analytics in one round trip
+  // (resolves to { profile, weights, analytics }).
+  createPlan: async (answers, variant = 'baseline') => {
+    const response = await apiClient.post('/plan', { answers, variant });
+    return response.data;
+  },
+
+  // Run backtesting analytics. Uses the GET form so the browser cache can
+  // revalidate with If-None-Match and get a 304 while market data is unchanged.
   runAnalytics: async (userWeights, label, axes) => {
-    const response = await apiClient.post('/analytics', {
-      user_weights: userWeights,
-      label,
-      axes
+    const pairs = (obj) => Object.entries(obj).map(([k, v]) => `${k}:${v}`).join(',');
+    const response = await apiClient.get('/analytics', {
+      params: { weights: pairs(userWeights), label, axes: pairs(axes) },
     });
     return response.data;
   },
@@ -0,0 +1,43 @@
+"""
+Efficient-frontier sweep over every long-only mix on a weight grid.
+
+All grid mixes are backtested as one (T, A) x (A, N) product and scored
+with the metrics_engine functions, so thousands of mixes cost a few
+matrix operations rather than thousands of backtests.
+"""
+import numpy as np
+
+import metrics_engine as me
+
+
+def simplex_grid(n_assets: int, step: int = 1) -> np.ndarray:
+    """(n_assets, N) weights in multiples of `step` percent that sum to 100%"""
+    if 100 % step:
+        raise ValueError("step must divide 100")
+    n = 100 // step
+    # Stars and bars: choose n_assets - 1 cut points among n + n_assets - 1 slots
+    grids = np.meshgrid(*[np.arange(n + 1)] * (n_assets - 1), indexing="ij")
+    head = np.stack([g.ravel() for g in grids])
+    head = head[:, head.sum(axis=0) <= n]
+    return np.vstack([head, n - head.sum(axis=0)]) / n
+
+
+def pareto_front(returns: np.ndarray, risks: np.ndarray) -> np.ndarray:
+    """Indices of the efficient points (no other point has lower-or-equal risk and higher return), by risk"""
+    order = np.lexsort((-returns, risks))
+    best_so_far = np.maximum.accumulate(returns[order])
+    keep = np.r_[True, returns[order][1:] > best_so_far[:-1]]
+    return order[keep]
+
+
+def sweep(asset_rets, index, step: int = 1, periods_per_year: int = 12) -> dict:
+    """Weights (A, N) and "cagr", "vol_ann", "max_dd" arrays (N,) for the whole grid"""
+    W = simplex_grid(np.shape(asset_rets)[1], step)
+    port_rets = me.portfolio_returns(asset_rets, W)
+    curves = me.growth_curves(port_rets)
+    return {
+        "weights": W,
+        "cagr": me.cagrs(curves, index),
+        "vol_ann": me.annualized_vol(port_rets, periods_per_year),
+        "max_dd": me.max_drawdowns(curves),
+    }
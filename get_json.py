@@ -1,61 +1,11 @@
-import json, requests 
+import os, json, requests
 from jsonschema import validate, ValidationError
-import yfinance as yf, pandas as pd, numpy as np
-import matplotlib.pyplot as plt 
-from backtest import cagr, max_drawdown, time_to_recover, download_sleeves
-
-SCHEMA = {
-  "type": "object",
-  "properties": {
-    "goal": {
-      "type": ["string", "null"],
-      "default": "steady growth"
-    },
-    "timeline_years": {
-      "type": ["number", "null"],
-      "default": 3
-    },
-    "loss_aversion": {
-      "type": "string",
-      "enum": ["very_low", "low", "moderate", "high", "very_high"],
-      "default": "moderate"
-    },
-    "liquidity_need": {
-      "type": "string",
-      "enum": ["low", "moderate", "high"],
-      "default": "moderate"
-    },
-    "income_stability": {
-      "type": "string",
-      "enum": ["stable", "variable", "unstable"],
-      "default": "variable"
-    },
-    "knowledge_level": {
-      "type": "string",
-      "enum": ["novice", "intermediate", "advanced"],
-      "default": "novice"
-    },
-    "notes": {
-      "type": ["string", "null"],
-      "default": ""
-    },
-    "confidences": {
-      "type": ["object","null"],
-      "default": {
-        "timeline_years": 3,
-        "loss_aversion": 0.5,
-        "liquidity_need": 0.5
-      },
-      "properties": {
-        "timeline_years": {"type": ["number","null"], "default": 3},
-        "loss_aversion": {"type": ["number","null"], "default": 0.5},
-        "liquidity_need": {"type": ["number","null"], "default": 0.5}
-      }
-    }
-  },
-  "required": ["goal", "timeline_years", "loss_aversion", 
-               "liquidity_need", "income_stability", "knowledge_level"]
-}
+import pandas as pd, numpy as np
+from risk_core import (
+    SCHEMA, POLICY, composite, choose_weights, align_weights, explain_mix,
+    compare_sentence, drawdown, enum_map_loss, map_liq, map_income,
+    map_knowledge, map_horizon, cagr, max_drawdown, time_to_recover
+)
 
 prompt = f"""
 Return ONLY valid JSON. JSON Schema:
@@ -73,7 +23,8 @@ Now produce the JSON object (no prose, no extra keys).
 """
 
 def call_ollama(prompt):
-    r = requests.post("http://localhost:11434/api/generate", json={
+    # The API server spreads load over OLLAMA_URLS (backend/llm_client.py); this CLI uses one node
+    r = requests.post(os.environ.get("OLLAMA_URL", "http://localhost:11434") + "/api/generate", json={
         "model": "risk-profiler",
         "prompt": prompt,
         "format": "json",
@@ -89,95 +40,10 @@ def call_ollama(prompt):
         if obj.get("done"): break
     return data
 
-raw = call_ollama(prompt)
-
-def align_weights(w, cols):
-    return pd.Series(w, dtype=float).reindex(cols).fillna(0.0)
-
-
-
-def enum_map_loss(s):
-    order = ["very_low","low","moderate","high","very_high"]
-    return order.index(s) / (len(order)-1)  # 0..1 (higher = more loss averse)
-
-def map_liq(s): return {"low":0.0,"moderate":0.5,"high":1.0}[s]
-def map_income(s): return {"stable":0.0,"variable":0.5,"unstable":1.0}[s]
-def map_knowledge(s): return {"novice":1.0,"intermediate":0.5,"advanced":0.0}[s]  # caution proxy
-def map_horizon(y): return max(0.0, min(y/30.0, 1.0))
-
-def composite(o):
-    loss = enum_map_loss(o["loss_aversion"])
-    liq  = map_liq(o["liquidity_need"])
-    inc  = map_income(o["income_stability"])
-    know = map_knowledge(o["knowledge_level"])
-    time = map_horizon(o["timeline_years"])
-    score = 100 * (0.35*(1-loss) + 0.20*(1-liq) + 0.20*(1-inc) + 0.15*(time) + 0.10*(1-know))
-    if score < 35: label = "Cautious Explorer"
-    elif score < 65: label = "Balanced Builder"
-    else: label = "Ambitious Growth-Seeker"
-    return round(score,1), label
-POLICY = {
-  "Cautious Explorer": {
-    "baseline":  {"equity": 30, "bonds": 60, "cash": 10},
-    "defensive": {"equity": 20, "bonds": 70, "cash": 10},
-    "aggressive":{"equity": 40, "bonds": 50, "cash": 10},
-  },
-  "Balanced Builder": {
-    "baseline":  {"equity": 60, "bonds": 35, "cash": 5},
-    "defensive": {"equity": 50, "bonds": 45, "cash": 5},
-    "aggressive":{"equity": 70, "bonds": 25, "cash": 5},
-  },
-  "Ambitious Growth-Seeker": {
-    "baseline":  {"equity": 80, "bonds": 15, "cash": 5},
-    "defensive": {"equity": 70, "bonds": 25, "cash": 5},
-    "aggressive":{"equity": 90, "bonds": 5,  "cash": 5},
-  }
-}
-def choose_weights(label:str, variant:str, axes:dict):
-    # 1) start from policy (percent → weights)
-    w = {k: v/100 for k,v in POLICY[label][variant].items()}
-
-    # 2) guardrail nudges from axes
-    if axes["liquidity"] >= 0.75:     # high liquidity need
-        w["cash"]  = max(w["cash"], 0.10)
-    if axes["loss_aversion"] >= 0.75: # very high loss aversion
-        w["bonds"] = max(w["bonds"], 1 - w["cash"] - 0.50)  # cap equity at 50%
-
-    # 3) renormalize
-    s = sum(w.values())
-    w = {k: v/s for k,v in w.items()}
-    return w
-
-def explain_mix(name, m):
-    # m = {"CAGR_%":10.87,"Vol_ann_%":9.63,"MaxDD_%":-16.61,"Worst_12m_%":-10.16,"Recovery_m":12}
-    risk = ("low" if m["Vol_ann_%"] < 7 else
-            "moderate" if m["Vol_ann_%"] < 12 else
-            "high")
-    dd_severity = ("mild" if m["MaxDD_%"] > -12 else
-                   "notable" if m["MaxDD_%"] > -20 else
-                   "deep")
-    rec = (f"About {m['Recovery_m']} months to recover from the worst dip."
-           if m["Recovery_m"] else "No extended recovery periods observed.")
-
-    return (
-        f"**{name}**: Grew at ~{m['CAGR_%']:.1f}% per year with {risk} volatility "
-        f"(~{m['Vol_ann_%']:.1f}%). Max drawdown was {m['MaxDD_%']:.1f}% ({dd_severity}). "
-        f"Worst 12-month stretch was {m['Worst_12m_%']:.1f}%. {rec}"
-    )
-
-def compare_sentence(a_name, a, b_name, b):
-    # Emphasize trade-offs
-    d_cagr = a["CAGR_%"] - b["CAGR_%"]
-    d_vol  = a["Vol_ann_%"] - b["Vol_ann_%"]
-    d_dd   = a["MaxDD_%"] - b["MaxDD_%"]  # less negative = shallower
-    bits = []
-    if abs(d_cagr) >= 0.5: bits.append(f"{a_name} has ~{d_cagr:+.1f}pp higher CAGR")
-    if abs(d_vol)  >= 0.5: bits.append(f"{d_vol:+.1f}pp change in vol")
-    if abs(d_dd)   >= 2.0: bits.append(f"{'shallower' if d_dd>0 else 'deeper'} max drawdown by {abs(d_dd):.1f}pp")
-    return f"{a_name} vs {b_name}: " + (", ".join(bits) if bits else "similar risk/return profile.") + "."
-def drawdown(curve: pd.Series) -> pd.Series:
-    return curve / curve.cummax() - 1.0
 if __name__=="__main__":
+    import matplotlib.pyplot as plt
+    from backtest import download_sleeves
+
     raw = call_ollama(prompt)
     try:
         obj = json.loads(raw)
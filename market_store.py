@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Local on-disk store for sleeve prices.
+
+Prices are kept as NumPy arrays (one float64 matrix of closes, one
+datetime64 vector of dates) next to a small JSON manifest carrying the
+column names, tickers and a content hash used as the data version. The
+monthly and daily returns served by the analytics endpoints are stored
+with each snapshot too. Array files are named after that version and the
+manifest is replaced last, so readers always see a complete snapshot and
+can memory-map it cheaply: every API worker maps the same files, sharing
+one copy through the page cache, and picks up a new version by noticing
+the manifest changed.
+
+Writers serialize on an exclusive file lock in the store directory, so
+concurrent workers download or refresh once between them.
+
+    python market_store.py refresh              # append only new trading days
+    python market_store.py refresh --full       # re-download the whole history
+    python market_store.py refresh --every 3600 # keep refreshing (external loader)
+    python market_store.py info
+"""
+import os
+import sys
+import json
+import hashlib
+import time
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single writer
+    fcntl = None
+
+DEFAULT_TICKERS = {
+    "equity": "NIFTYBEES.NS",
+    "bonds": "NETFLTGILT.NS",
+    "cash": "LIQUIDBEES.NS"
+}
+DEFAULT_START = "2014-01-01"
+MARKET_DATA_DIR = os.environ.get(
+    "MARKET_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "market_data")
+)
+
+# Days of overlap re-fetched on incremental refresh, used to splice new rows
+# onto the stored series even if the source re-adjusted past closes
+SPLICE_OVERLAP_DAYS = 14
+
+
+def content_version(prices: pd.DataFrame) -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps(list(prices.columns)).encode())
+    h.update(prices.index.values.astype("datetime64[ns]").tobytes())
+    h.update(np.ascontiguousarray(prices.values, dtype=np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def compute_returns(prices: pd.DataFrame):
+    """Monthly (month-end) and daily simple returns of `prices`"""
+    monthly = prices.resample("ME").last().pct_change().dropna()
+    daily = prices.pct_change().dropna()
+    return monthly, daily
+
+
+def snapshot_files(manifest: dict) -> list:
+    files = [manifest["prices_file"], manifest["dates_file"]]
+    for entry in manifest.get("returns", {}).values():
+        files += [entry["values_file"], entry["dates_file"]]
+    return files
+
+
+class MarketStore:
+    def __init__(self, path: str = MARKET_DATA_DIR):
+        self.path = path
+        self.manifest_path = os.path.join(path, "manifest.json")
+        self._manifest_stat = None
+        self._manifest_version = None
+
+    @contextmanager
+    def lock(self):
+        """Exclusive lock shared by every process using this store; hold it around
+        download/refresh/save. Not reentrant, even within one process."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, ".lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def current_version(self):
+        """Version named by the manifest; the file is only re-read after it is replaced"""
+        try:
+            st = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if key != self._manifest_stat:
+            self._manifest_version = (self.manifest() or {}).get("version")
+            self._manifest_stat = key
+        return self._manifest_version
+
+    def updated_at(self):
+        """When the store was last confirmed up to date (epoch seconds), or None"""
+        try:
+            return datetime.fromisoformat(self.manifest()["updated_at"]).timestamp()
+        except (TypeError, KeyError, ValueError):
+            return None
+
+    def manifest(self):
+        """Return the current manifest dict, or None if the store is empty"""
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def load(self, tickers: dict = None):
+        """Load prices as a DataFrame backed by memory-mapped arrays.
+
+        Returns None if nothing is stored yet or the stored tickers differ
+        from `tickers`.
+        """
+        for attempt in range(3):
+            manifest = self.manifest()
+            if manifest is None:
+                return None
+            if tickers is not None and manifest["tickers"] != tickers:
+                return None
+            try:
+                prices = self._frame(manifest["prices_file"], manifest["dates_file"], manifest["columns"])
+            except FileNotFoundError:
+                # A writer replaced the snapshot between reading the manifest and the arrays
+                if attempt == 2:
+                    raise
+                continue
+            prices.attrs["version"] = manifest["version"]
+            return prices
+
+    def load_returns(self, prices: pd.DataFrame):
+        """Monthly and daily returns of `prices`: memory-mapped from its snapshot
+        when stored with it, computed otherwise"""
+        manifest = self.manifest() or {}
+        stored = manifest.get("returns")
+        if stored and prices.attrs.get("version") == manifest["version"]:
+            try:
+                return tuple(
+                    self._frame(stored[k]["values_file"], stored[k]["dates_file"], manifest["columns"])
+                    for k in ("monthly", "daily")
+                )
+            except FileNotFoundError:
+                pass
+        return compute_returns(prices)
+
+    def _frame(self, values_file: str, dates_file: str, columns) -> pd.DataFrame:
+        values = np.load(os.path.join(self.path, values_file), mmap_mode="r")
+        dates = np.load(os.path.join(self.path, dates_file))
+        return pd.DataFrame(values, index=pd.DatetimeIndex(dates), columns=columns, copy=False)
+
+    def _write_array(self, name: str, array: np.ndarray) -> str:
+        np.save(os.path.join(self.path, name), array)
+        return name
+
+    def _write_manifest(self, manifest: dict):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def touch(self):
+        """Mark the current snapshot as up to date without writing new arrays"""
+        manifest = self.manifest()
+        manifest["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._write_manifest(manifest)
+
+    def save(self, prices: pd.DataFrame, tickers: dict, start: str = DEFAULT_START,
+             sources: Optional[dict] = None) -> str:
+        """Write a new snapshot and atomically switch the manifest to it.
+
+        `sources` records the ticker each column was downloaded from
+        (default: download_sleeves' prices.attrs["sources"], else `tickers`).
+        """
+        sources = sources or prices.attrs.get("sources") or tickers
+        os.makedirs(self.path, exist_ok=True)
+        index = prices.index
+        if getattr(index, "tz", None) is not None:
+            index = index.tz_localize(None)
+        prices = pd.DataFrame(prices.values.astype(np.float64), index=index.normalize(), columns=list(prices.columns))
+        version = content_version(prices)
+
+        prices_file = self._write_array(f"prices-{version}.npy", prices.values)
+        dates_file = self._write_array(f"dates-{version}.npy", prices.index.values.astype("datetime64[ns]"))
+        returns = {}
+        for kind, rets in zip(("monthly", "daily"), compute_returns(prices)):
+            returns[kind] = {
+                "values_file": self._write_array(f"{kind}-{version}.npy", rets.values),
+                "dates_file": self._write_array(f"{kind}_dates-{version}.npy",
+                                                rets.index.values.astype("datetime64[ns]")),
+            }
+
+        old = self.manifest()
+        manifest = {
+            "version": version,
+            "columns": list(prices.columns),
+            "tickers": tickers,
+            "sources": sources,
+            "start": start,
+            "first_date": prices.index[0].strftime("%Y-%m-%d"),
+            "last_date": prices.index[-1].strftime("%Y-%m-%d"),
+            "rows": len(prices),
+            "prices_file": prices_file,
+            "dates_file": dates_file,
+            "returns": returns,
+            "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        self._write_manifest(manifest)
+
+        # Old snapshot files are no longer referenced; readers that already
+        # mapped them keep their view until they reload
+        if old and old["version"] != version:
+            for name in snapshot_files(old):
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+        return version
+
+    def refresh(self, tickers: dict = DEFAULT_TICKERS, start: str = DEFAULT_START, full: bool = False) -> pd.DataFrame:
+        """Bring the store up to date and return the stored prices.
+
+        Incremental refresh downloads only the last few weeks, rescales them
+        to the stored level on the last common date and appends rows after
+        the stored last date. Falls back to a full download if the store is
+        empty, was built for other tickers, a sleeve now comes from a
+        different ticker (a fallback, or synthetic cash) than the stored
+        history, or the new data cannot be spliced.
+        Callers sharing the store should hold lock().
+        """
+        from backtest import download_sleeves  # network/yfinance only when refreshing
+
+        existing = None if full else self.load(tickers)
+        if existing is None:
+            prices = download_sleeves(tickers, start=start)
+            self.save(prices, tickers, start)
+            return self.load()
+
+        last = existing.index[-1]
+        since = (last - timedelta(days=SPLICE_OVERLAP_DAYS)).strftime("%Y-%m-%d")
+        new = download_sleeves(tickers, start=since)
+        if getattr(new.index, "tz", None) is not None:
+            new.index = new.index.tz_localize(None)
+        new.index = new.index.normalize()
+        new = new.reindex(columns=existing.columns)
+
+        stored_sources = self.manifest().get("sources") or tickers
+        new_sources = new.attrs.get("sources") or tickers
+        switched = [c for c in existing.columns if stored_sources.get(c) != new_sources.get(c)]
+        if switched:
+            # Rescaling one ticker's prices onto another's history would splice two different series
+            print(f"{', '.join(switched)} now from {', '.join(str(new_sources.get(c)) for c in switched)}, "
+                  f"doing a full refresh")
+            return self.refresh(tickers, start, full=True)
+
+        common = new.index[(new.index <= last) & new.index.isin(existing.index)]
+        if len(common) == 0 or new.isna().any().any():
+            print("Cannot splice incremental data onto stored prices, doing a full refresh")
+            return self.refresh(tickers, start, full=True)
+
+        anchor = common[-1]
+        scale = existing.loc[anchor] / new.loc[anchor]
+        appended = new[new.index > last] * scale
+        if appended.empty:
+            # Nothing new, but the check counts as a refresh for every reader's TTL
+            self.touch()
+            return existing
+
+        prices = pd.concat([pd.DataFrame(np.asarray(existing), index=existing.index, columns=existing.columns), appended])
+        self.save(prices, tickers, self.manifest().get("start", start), sources=stored_sources)
+        return self.load()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["refresh", "info"])
+    parser.add_argument("--path", default=MARKET_DATA_DIR, help="store directory")
+    parser.add_argument("--start", default=DEFAULT_START, help="history start date for full downloads")
+    parser.add_argument("--full", action="store_true", help="re-download the whole history")
+    parser.add_argument("--every", type=float, default=None,
+                        help="keep running and refresh every N seconds (loader for MARKET_DATA_LOADER=external)")
+    args = parser.parse_args()
+
+    store = MarketStore(args.path)
+    if args.command == "refresh":
+        full = args.full
+        while True:
+            try:
+                with store.lock():
+                    before = store.manifest()
+                    store.refresh(DEFAULT_TICKERS, start=args.start, full=full)
+                    after = store.manifest()
+            except Exception as e:
+                if args.every is None:
+                    raise
+                # Readers keep the current snapshot; try again next round
+                print(f"✗ Refresh failed: {e}")
+            else:
+                added = after["rows"] - (before["rows"] if before and not full else 0)
+                print(f"✓ Store at version {after['version']}: {after['rows']} rows "
+                      f"({after['first_date']} to {after['last_date']}), {added} new")
+            if args.every is None:
+                break
+            full = False
+            time.sleep(args.every)
+    else:
+        manifest = store.manifest()
+        if manifest is None:
+            print(f"No market data stored in {args.path}. Run: python market_store.py refresh")
+            return 1
+        print(json.dumps(manifest, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
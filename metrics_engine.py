@@ -0,0 +1,110 @@
+"""
+Vectorized backtest metrics for many portfolios at once.
+
+Everything here works on a (T, P) matrix of periodic portfolio returns, one
+column per portfolio, and reproduces the scalar reference implementations
+in risk_core (cagr, max_drawdown, time_to_recover) and the rolling
+worst-N-period return used by the analytics endpoint, without any per-row
+or per-window Python callbacks.
+"""
+import numpy as np
+
+NS_PER_DAY = 86_400_000_000_000
+
+
+def _as_matrix(a) -> np.ndarray:
+    a = np.asarray(a, dtype=np.float64)
+    return a[:, None] if a.ndim == 1 else a
+
+
+def _index_ns(index) -> np.ndarray:
+    """Timestamps as int64 nanoseconds (accepts a DatetimeIndex or datetime64 array)"""
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_convert(None)
+    # Go through datetime64[ns] explicitly: pandas indexes may use s/ms/us units
+    return np.asarray(index, dtype="datetime64[ns]").astype(np.int64)
+
+
+def portfolio_returns(asset_rets, weights) -> np.ndarray:
+    """(T, A) asset returns x (A, P) weights -> (T, P) constant-mix portfolio returns"""
+    return np.asarray(asset_rets, dtype=np.float64) @ _as_matrix(weights)
+
+
+def growth_curves(port_rets) -> np.ndarray:
+    """Value of 1 invested, per period and portfolio"""
+    return np.cumprod(1.0 + _as_matrix(port_rets), axis=0)
+
+
+def drawdowns(curves) -> np.ndarray:
+    curves = _as_matrix(curves)
+    return curves / np.maximum.accumulate(curves, axis=0) - 1.0
+
+
+def cagrs(curves, index) -> np.ndarray:
+    ns = _index_ns(index)
+    n_years = ((ns[-1] - ns[0]) // NS_PER_DAY) / 365.25
+    return _as_matrix(curves)[-1] ** (1 / n_years) - 1
+
+
+def annualized_vol(port_rets, periods_per_year: int = 12) -> np.ndarray:
+    return np.std(_as_matrix(port_rets), axis=0, ddof=1) * np.sqrt(periods_per_year)
+
+
+def max_drawdowns(curves) -> np.ndarray:
+    return drawdowns(curves).min(axis=0)
+
+
+def worst_rolling_return(port_rets, window: int = 12) -> np.ndarray:
+    """Worst compounded return over any `window` consecutive periods (NaN if too short)"""
+    port_rets = _as_matrix(port_rets)
+    if len(port_rets) < window:
+        return np.full(port_rets.shape[1], np.nan)
+    cum_log = np.vstack([np.zeros((1, port_rets.shape[1])), np.cumsum(np.log1p(port_rets), axis=0)])
+    return np.expm1((cum_log[window:] - cum_log[:-window]).min(axis=0))
+
+
+def longest_recovery(curves, index) -> np.ndarray:
+    """Longest peak-to-recovery span in months (days // 30) per portfolio, 0 if none.
+
+    Same rules as risk_core.time_to_recover: a dip starts at the period
+    before the curve first falls below its running peak, ends when the curve
+    is back at or above that peak, and a dip still open at the end of the
+    history is not counted.
+    """
+    curves = _as_matrix(curves)
+    T, P = curves.shape
+    if T < 2:
+        return np.zeros(P, dtype=np.int64)
+    ns = _index_ns(index)
+    prev_peak = np.maximum.accumulate(curves, axis=0)[:-1]
+    under = curves[1:] < prev_peak                      # (T-1, P), row k is period k+1
+    was_under = np.vstack([np.zeros((1, P), dtype=bool), under[:-1]])
+    starts = under & ~was_under
+    recoveries = ~under & was_under
+
+    # Row of the most recent dip start, forward-filled down each column
+    rows = np.arange(T - 1)[:, None]
+    last_start = np.maximum.accumulate(np.where(starts, rows, 0), axis=0)
+    # A dip starting at row k was timed from period k (the one before the fall)
+    start_ns = ns[:-1][last_start]
+    months = (ns[1:, None] - start_ns) // NS_PER_DAY // 30
+    return np.where(recoveries, months, 0).max(axis=0)
+
+
+def compute_metrics(port_rets, index, periods_per_year: int = 12, window: int = 12) -> dict:
+    """All analytics metrics for every column of `port_rets` in one pass.
+
+    Returns arrays (length P) under "cagr", "vol_ann", "max_dd",
+    "worst_window" (fractions) and "recovery_m" (int months, 0 = none),
+    plus the "curves" matrix they were computed from.
+    """
+    port_rets = _as_matrix(port_rets)
+    curves = growth_curves(port_rets)
+    return {
+        "curves": curves,
+        "cagr": cagrs(curves, index),
+        "vol_ann": annualized_vol(port_rets, periods_per_year),
+        "max_dd": max_drawdowns(curves),
+        "worst_window": worst_rolling_return(port_rets, window),
+        "recovery_m": longest_recovery(curves, index),
+    }
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Local HTTP stand-in for the price source, so downloads can be tested and
+timed offline. Serves deterministic synthetic daily closes as CSV:
+
+    GET /prices/<ticker>?start=YYYY-MM-DD  ->  Date,Close
+
+Point backtest.fetch_prices at it with PRICE_SOURCE_URL=http://127.0.0.1:8765
+    python price_server.py --port 8765 --latency 0.5 --missing NETFLTGILT.NS
+"""
+import argparse
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+END = "2024-12-31"
+
+
+def synthetic_closes(ticker, start, end=END):
+    """Seeded random walk per ticker, business days from `start` to `end`"""
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    dates = pd.bdate_range(start, end)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, len(dates))))
+    return pd.Series(closes, index=dates, name="Close")
+
+
+def make_handler(latency=0.0, missing=(), slow=None):
+    missing, slow = set(missing), dict(slow or {})
+
+    class PriceHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            ticker = url.path.rsplit("/", 1)[-1]
+            if not url.path.startswith("/prices/") or ticker in missing:
+                self.send_error(404)
+                return
+            time.sleep(slow.get(ticker, latency))
+            start = parse_qs(url.query).get("start", ["2014-01-01"])[0]
+            body = synthetic_closes(ticker, start).to_csv(index_label="Date").encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return PriceHandler
+
+
+def serve(port=0, latency=0.0, missing=(), slow=None):
+    """Start the server on a daemon thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, missing, slow))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--missing", nargs="*", default=[], help="tickers that return 404")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.latency, args.missing))
+    print(f"Serving synthetic prices on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,100 @@
+"""
+Backtests with rebalancing schedules, for monthly or daily returns.
+
+Between two rebalances a portfolio is buy-and-hold: each sleeve grows with
+its own returns and the weights drift. Holding periods ("segments") are
+therefore evaluated in closed form from cumulative asset growth, for all
+portfolios and all rows at once:
+
+    value_t = value at segment start * sum_i w_i * G_i,t / G_i,start-1
+
+Calendar schedules know their segments up front. Threshold (drift-band)
+rebalancing is path dependent, so its segments are found by scanning the
+drift of the current segment a chunk of rows at a time; Python only loops
+once per rebalance (plus once per `chunk` rows without one), never per day.
+"""
+import numpy as np
+
+SCHEDULES = ("none", "monthly", "quarterly", "annual", "threshold")
+
+# Months per period for the calendar schedules
+_CALENDAR_MONTHS = {"monthly": 1, "quarterly": 3, "annual": 12}
+
+
+def calendar_starts(index, schedule: str) -> np.ndarray:
+    """First row of every holding period: rebalancing happens at the close of
+    the last row of each calendar period, so row 0 and every row that opens
+    a new period start a segment."""
+    if schedule == "none":
+        return np.array([0])
+    months = np.asarray(index.year) * 12 + np.asarray(index.month) - 1
+    period = months // _CALENDAR_MONTHS[schedule]
+    return np.flatnonzero(np.r_[True, period[1:] != period[:-1]])
+
+
+def _growth(asset_rets: np.ndarray) -> np.ndarray:
+    """Cumulative growth with a leading row of ones: row t+1 is growth through row t"""
+    return np.vstack([np.ones((1, asset_rets.shape[1])), np.cumprod(1.0 + asset_rets, axis=0)])
+
+
+def segment_values(asset_rets, weights, starts, growth=None) -> np.ndarray:
+    """(T, P) value of 1 invested, rebalancing to `weights` (A, P) at every row in `starts`"""
+    asset_rets = np.asarray(asset_rets, dtype=np.float64)
+    W = np.asarray(weights, dtype=np.float64)
+    W = W[:, None] if W.ndim == 1 else W
+    G = _growth(asset_rets) if growth is None else growth
+    T = len(asset_rets)
+    is_start = np.zeros(T, dtype=bool)
+    is_start[starts] = True
+    seg = np.cumsum(is_start) - 1
+    # Growth of each sleeve since its segment started, then the drifting mix
+    ratio = (G[1:] / G[starts][seg]) @ W
+    ends = np.r_[starts[1:] - 1, T - 1]
+    start_value = np.vstack([np.ones((1, W.shape[1])), np.cumprod(ratio[ends], axis=0)[:-1]])
+    return start_value[seg] * ratio
+
+
+def drift_starts(asset_rets, weights, band: float, chunk: int = 256, growth=None) -> np.ndarray:
+    """Segment starts for one portfolio rebalanced whenever a sleeve's weight is
+    more than `band` (absolute) away from its target, checked at each close"""
+    asset_rets = np.asarray(asset_rets, dtype=np.float64)
+    w = np.asarray(weights, dtype=np.float64)
+    G = _growth(asset_rets) if growth is None else growth
+    T = len(asset_rets)
+    starts = [0]
+    s = e = 0
+    while e < T:
+        hi = min(e + chunk, T)
+        held = G[e + 1:hi + 1] / G[s] * w
+        drift = np.abs(held / held.sum(axis=1, keepdims=True) - w).max(axis=1)
+        breach = np.flatnonzero(drift > band)
+        if breach.size == 0:
+            e = hi
+            continue
+        s = e = e + breach[0] + 1        # rebalanced at that close; next segment opens on the next row
+        if s < T:
+            starts.append(s)
+    return np.array(starts)
+
+
+def rebalanced_returns(asset_rets, weights, index, schedule: str = "monthly", band: float = 0.05):
+    """Periodic returns (T, P) of each weight column under `schedule`, plus rebalance counts (P,)"""
+    if schedule not in SCHEDULES:
+        raise ValueError(f"Unknown rebalancing schedule: {schedule}")
+    asset_rets = np.asarray(asset_rets, dtype=np.float64)
+    W = np.asarray(weights, dtype=np.float64)
+    W = W[:, None] if W.ndim == 1 else W
+    G = _growth(asset_rets)
+    if schedule == "threshold":
+        columns, counts = [], []
+        for j in range(W.shape[1]):
+            starts = drift_starts(asset_rets, W[:, j], band, growth=G)
+            columns.append(segment_values(asset_rets, W[:, j], starts, growth=G)[:, 0])
+            counts.append(len(starts) - 1)
+        values, counts = np.column_stack(columns), np.array(counts)
+    else:
+        starts = calendar_starts(index, schedule)
+        values = segment_values(asset_rets, W, starts, growth=G)
+        counts = np.full(W.shape[1], len(starts) - 1)
+    previous = np.vstack([np.ones((1, W.shape[1])), values[:-1]])
+    return values / previous - 1.0, counts
@@ -4,7 +4,10 @@ Test script to verify backend API endpoints work correctly
 """
 import sys
 import os
+import asyncio
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# backend modules import each other flat (`from models import *`)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
 
 from backend.services import RiskProfilerService
 from backend.models import UserAnswers
@@ -23,7 +26,7 @@ def test_profile_generation():
     )
     
     try:
-        result = service.generate_profile(sample_answers)
+        result = asyncio.run(service.generate_profile(sample_answers))
         print("✅ Profile generation successful!")
         print(f"   Label: {result.label}")
         print(f"   Score: {result.score}")
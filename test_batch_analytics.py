@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+/analytics/batch: every portfolio of a batch gets the same metrics and growth
+curve as a single-portfolio run_analytics of its weights, and unknown asset
+classes are rejected.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from models import AnalyticsRequest, BatchAnalyticsRequest, BatchPortfolio  # noqa: E402
+
+AXES = {"time_horizon": 0.5, "loss_aversion": 0.5, "liquidity": 0.5, "income_stability": 0.5,
+        "knowledge_caution": 0.5}
+WEIGHTS = [
+    {"equity": 0.6, "bonds": 0.35, "cash": 0.05},
+    {"equity": 1.0},  # missing sleeves count as 0
+    {"bonds": 0.2, "cash": 0.8},
+] + [dict(zip(["equity", "bonds", "cash"], w)) for w in np.random.default_rng(3).dirichlet(np.ones(3), 5)]
+
+
+def test_batch_matches_single_portfolio_analytics(service):
+    batch = service.run_batch_analytics(BatchAnalyticsRequest(
+        portfolios=[BatchPortfolio(weights=w) for w in WEIGHTS[:-1]] + [BatchPortfolio(name="Last", weights=WEIGHTS[-1])],
+        include_curves=True,
+    ))
+    assert [r.name for r in batch.results] == [f"Portfolio {j + 1}" for j in range(len(WEIGHTS) - 1)] + ["Last"]
+
+    for weights, result in zip(WEIGHTS, batch.results):
+        single = service.run_analytics(AnalyticsRequest(user_weights=weights, label="Balanced Builder", axes=AXES))
+        mix = next(p for p in single.portfolios if p.name == "Your Mix")
+        assert result.weights == weights
+        assert result.metrics == mix.metrics
+        chart = single.growth_chart["Your Mix"]
+        assert batch.dates == chart.dates
+        np.testing.assert_allclose(result.growth, chart.values, rtol=1e-9)
+
+
+def test_batch_rejects_unknown_asset_classes(service):
+    with pytest.raises(ValueError, match="gold"):
+        service.run_batch_analytics(BatchAnalyticsRequest(portfolios=[BatchPortfolio(weights={"gold": 1.0})]))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+charts: LTTB keeps the requested number of points, both endpoints and the
+spikes of every series, and the compact /analytics payload (downsampled,
+float32/base64) decodes back to the full-resolution values.
+"""
+import base64
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from charts import compact_series, lttb_indices  # noqa: E402
+from models import CompactAnalyticsRequest  # noqa: E402
+
+AXES = {"time_horizon": 0.5, "loss_aversion": 0.5, "liquidity": 0.5, "income_stability": 0.5,
+        "knowledge_caution": 0.5}
+
+
+def noisy_series(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    Y = np.cumsum(rng.normal(size=(n, 2)), axis=0)
+    Y[337, 0] += 500.0   # spike in the first series
+    Y[712, 1] -= 500.0   # dip in the second
+    return Y
+
+
+@pytest.mark.parametrize("n_out", [3, 10, 100, 999])
+def test_lttb_keeps_point_count_endpoints_and_extrema(n_out):
+    Y = noisy_series()
+    idx = lttb_indices(Y, n_out)
+    assert len(idx) == n_out and len(set(idx)) == n_out
+    assert np.all(np.diff(idx) > 0)
+    assert idx[0] == 0 and idx[-1] == len(Y) - 1
+    if n_out > 3:
+        assert {337, 712} <= set(idx.tolist())
+
+
+@pytest.mark.parametrize("n_out", [None, 2, 1000, 5000])
+def test_lttb_returns_everything_when_it_cannot_downsample(n_out):
+    Y = noisy_series()
+    assert np.array_equal(lttb_indices(Y, n_out or 0), np.arange(len(Y)))
+
+
+def test_compact_series_shares_one_axis():
+    Y = noisy_series()
+    dates = [f"d{i}" for i in range(len(Y))]
+    out = compact_series(dates, {"a": Y[:, 0], "b": Y[:, 1]}, max_points=50, decimals=2)
+    assert len(out["dates"]) == 50 and out["dates"][0] == "d0" and out["dates"][-1] == "d999"
+    idx = [int(d[1:]) for d in out["dates"]]
+    np.testing.assert_allclose(out["series"]["a"], np.round(Y[idx, 0], 2))
+    np.testing.assert_allclose(out["series"]["b"], np.round(Y[idx, 1], 2))
+
+
+def decode_f32(text):
+    return np.frombuffer(base64.b64decode(text), dtype="<f4")
+
+
+def test_f32_compact_analytics_round_trips(service):
+    params = dict(user_weights={"equity": 0.6, "bonds": 0.35, "cash": 0.05}, label="Balanced Builder", axes=AXES)
+    full = service.run_compact_analytics(CompactAnalyticsRequest(**params, decimals=10))
+    compact = service.run_compact_analytics(CompactAnalyticsRequest(**params, max_points=40, encoding="f32"))
+
+    for full_chart, chart in ((full.growth_chart, compact.growth_chart),
+                              (full.drawdown_chart, compact.drawdown_chart)):
+        assert chart.series is None and set(chart.encoded) == set(full_chart.series)
+        assert len(chart.dates) == 40
+        assert chart.dates[0] == full_chart.dates[0] and chart.dates[-1] == full_chart.dates[-1]
+        position = {d: i for i, d in enumerate(full_chart.dates)}
+        idx = [position[d] for d in chart.dates]
+        for name, encoded in chart.encoded.items():
+            values = decode_f32(encoded)
+            assert values.dtype == np.float32 and len(values) == 40
+            np.testing.assert_allclose(values, np.asarray(full_chart.series[name])[idx], rtol=1e-6, atol=1e-7)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+download_sleeves against the local price_server.py stand-in: sleeves
+download in parallel, fallbacks keep their sequential semantics and a
+missing cash sleeve is still synthesized.
+"""
+import time
+from functools import partial
+
+import pytest
+
+from backtest import download_sleeves, fetch_prices
+import price_server
+
+TICKERS = {"equity": "NIFTYBEES.NS", "bonds": "NETFLTGILT.NS", "cash": "LIQUIDBEES.NS"}
+LATENCY = 0.3
+
+
+@pytest.fixture
+def source():
+    servers = []
+
+    def start(**kwargs):
+        server, url = price_server.serve(**kwargs)
+        servers.append(server)
+        return partial(fetch_prices, source=url)
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_sleeves_download_in_parallel(source):
+    fetch = source(latency=LATENCY)
+    t0 = time.perf_counter()
+    prices = download_sleeves(TICKERS, start="2020-01-01", fetch=fetch)
+    elapsed = time.perf_counter() - t0
+    assert list(prices.columns) == ["equity", "bonds", "cash"]
+    assert len(prices) > 1000
+    # Sequential would be 3 * LATENCY
+    assert elapsed < 2 * LATENCY
+
+
+def test_fallback_used_when_primary_missing(source):
+    fetch = source(missing={"NETFLTGILT.NS"})
+    prices = download_sleeves(TICKERS, start="2020-01-01", fetch=fetch)
+    expected = price_server.synthetic_closes("GOLDBEES.NS", "2020-01-01")
+    assert prices["bonds"].iloc[0] == pytest.approx(expected.iloc[0])
+    assert prices.attrs["sources"] == {**TICKERS, "bonds": "GOLDBEES.NS"}
+
+
+def test_slow_primary_still_preferred_over_hedged_fallback(source):
+    fetch = source(slow={"NETFLTGILT.NS": 0.5})
+    prices = download_sleeves(TICKERS, start="2020-01-01", fetch=fetch, hedge=0.1)
+    expected = price_server.synthetic_closes("NETFLTGILT.NS", "2020-01-01")
+    assert prices["bonds"].iloc[0] == pytest.approx(expected.iloc[0])
+
+
+def test_deadline_settles_for_finished_fallback(source):
+    fetch = source(slow={"NETFLTGILT.NS": 2.0})
+    t0 = time.perf_counter()
+    prices = download_sleeves(TICKERS, start="2020-01-01", fetch=fetch, hedge=0.1, deadline=0.5)
+    assert time.perf_counter() - t0 < 1.5
+    expected = price_server.synthetic_closes("GOLDBEES.NS", "2020-01-01")
+    assert prices["bonds"].iloc[0] == pytest.approx(expected.iloc[0])
+
+
+def test_synthetic_cash_when_all_cash_tickers_fail(source):
+    fetch = source(missing={"LIQUIDBEES.NS", "ICICIBANK.NS", "HDFC.NS"})
+    prices = download_sleeves(TICKERS, start="2020-01-01", fetch=fetch)
+    assert "cash" in prices.columns
+    assert prices["cash"].iloc[0] == 1.0
+    assert prices.attrs["sources"]["cash"] == "synthetic"
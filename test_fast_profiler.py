@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+fast_profiler: rule-based loss aversion from the questionnaire answers,
+including negated exit phrases, and the confidence gate that decides
+whether the LLM is skipped.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from fast_profiler import FAST_PATH_THRESHOLD, extract_profile, fast_profile  # noqa: E402
+from models import UserAnswers  # noqa: E402
+
+# (answer1, answer2, answer3, expected loss_aversion or None, served without the LLM)
+NO_NEEDS = "No, investing for 10 years"
+
+CASES = [
+    ("I'd hold but feel stressed.", "Prefer steady growth, some risk okay.", "Down payment in ~3 years.", "high", True),
+    ("I would panic and sell everything", "Safety first", NO_NEEDS, "very_high", True),
+    ("I'd buy more", "Growth", NO_NEEDS, "low", True),
+    ("I would reduce my exposure", "Steady", NO_NEEDS, "high", True),
+    ("I would not panic", "steady", NO_NEEDS, "moderate", True),
+    ("I would not exit", "steady", NO_NEEDS, "moderate", True),
+    ("I'd never pull my money out", "steady", NO_NEEDS, "moderate", True),
+    ("I wouldn't sell, I'd buy more", "growth", NO_NEEDS, "low", True),
+    # Negation the rules cannot resolve: must go to the LLM
+    ("I wouldn't buy more", "steady", NO_NEEDS, None, False),
+    ("I wouldn't hold, I'd sell", "steady", NO_NEEDS, None, False),
+    ("Stay invested, I am not worried", "steady", NO_NEEDS, None, False),
+    ("I would hold, not stressed at all", "steady", NO_NEEDS, None, False),
+]
+
+
+@pytest.mark.parametrize("answer1,answer2,answer3,loss,fast", CASES)
+def test_loss_aversion(answer1, answer2, answer3, loss, fast):
+    answers = UserAnswers(answer1=answer1, answer2=answer2, answer3=answer3)
+    profile, confidence = extract_profile(answers)
+    if loss is not None:
+        assert profile["loss_aversion"] == loss
+    else:
+        assert confidence["loss_aversion"] < FAST_PATH_THRESHOLD
+    assert (fast_profile(answers) is not None) == fast
+
+
+def test_canonical_example_fields():
+    answers = UserAnswers(answer1="I'd hold but feel stressed.", answer2="Prefer steady growth, some risk okay.",
+                          answer3="Down payment in ~3 years.")
+    profile, _ = extract_profile(answers)
+    assert profile["liquidity_need"] == "high"
+    assert profile["timeline_years"] == 3.0
+
+
+# (answer3, liquidity_need or None if left to the LLM, timeline_years or None if left to the LLM)
+NEEDS_CASES = [
+    ("Down payment in ~3 years.", "high", 3.0),
+    ("No, investing for 10 years", "low", 10.0),
+    ("Nope.", "low", None),         # no cash needs, but no horizon either
+    ("No idea", None, None),
+    ("Not sure", None, None),
+    ("I have a 2 year old baby", None, None),  # an age, not a horizon
+    ("Wedding in 18 months", "high", 1.5),
+]
+
+
+@pytest.mark.parametrize("answer3,liquidity,timeline", NEEDS_CASES)
+def test_liquidity_and_timeline(answer3, liquidity, timeline):
+    answers = UserAnswers(answer1="I'd hold", answer2="steady", answer3=answer3)
+    profile, confidence = extract_profile(answers)
+    if liquidity is None:
+        assert confidence["liquidity_need"] < FAST_PATH_THRESHOLD
+    else:
+        assert profile["liquidity_need"] == liquidity and confidence["liquidity_need"] >= FAST_PATH_THRESHOLD
+    if timeline is None:
+        assert confidence["timeline_years"] < FAST_PATH_THRESHOLD
+    else:
+        assert profile["timeline_years"] == timeline and confidence["timeline_years"] >= FAST_PATH_THRESHOLD
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+frontier: the weight grid covers the simplex exactly once and the Pareto
+filter agrees with a brute-force dominance check; /frontier sweeps each
+step once for both risk measures.
+"""
+import numpy as np
+import pandas as pd
+
+import metrics_engine as me
+from frontier import pareto_front, simplex_grid, sweep
+from models import FrontierRequest
+
+
+def test_grid_is_the_whole_simplex():
+    W = simplex_grid(3, 1)
+    assert W.shape == (3, 5151)  # C(102, 2)
+    np.testing.assert_allclose(W.sum(axis=0), 1.0)
+    assert W.min() >= 0
+    assert len({tuple(np.round(col, 6)) for col in W.T}) == W.shape[1]
+    assert simplex_grid(3, 5).shape == (3, 231)
+
+
+def test_pareto_front_matches_brute_force():
+    rng = np.random.default_rng(0)
+    returns, risks = rng.normal(size=500), rng.uniform(size=500)
+    front = pareto_front(returns, risks)
+    brute = [i for i in range(500) if not np.any((risks <= risks[i]) & (returns > returns[i]))]
+    assert sorted(front) == brute
+    assert np.all(np.diff(risks[front]) >= 0) and np.all(np.diff(returns[front]) > 0)
+
+
+def test_sweep_matches_metrics_engine_per_mix():
+    rng = np.random.default_rng(1)
+    index = pd.date_range("2014-01-31", periods=120, freq="ME")
+    rets = rng.normal([0.008, 0.005, 0.003], [0.05, 0.02, 0.003], (120, 3))
+    grid = sweep(rets, index, step=10)
+    j = 17
+    m = me.compute_metrics(me.portfolio_returns(rets, grid["weights"][:, j]), index)
+    for key in ("cagr", "vol_ann", "max_dd"):
+        np.testing.assert_allclose(grid[key][j], m[key][0])
+
+
+def test_both_risk_measures_share_one_sweep(service):
+    weights = {"equity": 0.5, "bonds": 0.3, "cash": 0.2}
+    by_vol = service.run_frontier(FrontierRequest(user_weights=weights, step=5, risk="vol"))
+    by_dd = service.run_frontier(FrontierRequest(user_weights=weights, step=5, risk="max_dd"))
+    assert list(service._frontiers) == [5]
+    assert by_vol.grid_size == by_dd.grid_size == 231
+    # Each frontier is ordered by its own risk measure
+    assert [p.Vol_ann_pct for p in by_vol.frontier] == sorted(p.Vol_ann_pct for p in by_vol.frontier)
+    assert [p.MaxDD_pct for p in by_dd.frontier] == sorted((p.MaxDD_pct for p in by_dd.frontier), reverse=True)
+    assert by_vol.user.point == by_dd.user.point
+    assert service.run_frontier(FrontierRequest(step=5, risk="vol")).frontier is by_vol.frontier
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Bulk profiling jobs: bounded concurrency, resume from the results file
+after an interruption (including a torn last line) and retry on a full
+LLM queue.
+"""
+import asyncio
+import json
+import os
+import shutil
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from jobs import JobManager  # noqa: E402
+from llm_client import LLMOverloaded  # noqa: E402
+
+RECORDS = "\n".join(json.dumps({"id": f"r{i}", "answer1": "a", "answer2": "b", "answer3": "c"}) for i in range(20))
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def result_indices(path, job_id):
+    with open(os.path.join(path, job_id, "results.jsonl")) as f:
+        return sorted(json.loads(line)["index"] for line in f)
+
+
+def run_status(path, job_id):
+    with open(os.path.join(path, job_id, "job.json")) as f:
+        return json.load(f)["status"]
+
+
+def test_job_runs_with_bounded_concurrency(tmp_path):
+    in_flight, peak = 0, 0
+
+    async def process(record, variant):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"variant": variant, "echo": record["id"]}
+
+    async def main():
+        jobs = JobManager(process, path=str(tmp_path), concurrency=3)
+        await jobs.start()
+        job_id = jobs.submit("q.jsonl", RECORDS.encode(), "defensive")["id"]
+        while jobs.status(job_id)["status"] != "completed":
+            await asyncio.sleep(0.01)
+        await jobs.stop()
+        return jobs.status(job_id)
+
+    status = run(main())
+    assert peak == 3
+    assert status["succeeded"] == 20 and status["progress"] == 1.0
+    assert status["records_per_min"] > 0
+    assert result_indices(tmp_path, status["id"]) == list(range(20))
+
+
+def test_interrupted_job_resumes_where_it_stopped(tmp_path):
+    calls = []
+
+    async def process(record, variant):
+        calls.append(record["id"])
+        await asyncio.sleep(0.01)
+        if record["id"] == "r3" and calls.count("r3") == 1:
+            raise LLMOverloaded(0)  # retried, not failed
+        return {}
+
+    async def first_run():
+        jobs = JobManager(process, path=str(tmp_path), concurrency=2, checkpoint_seconds=0)
+        await jobs.start()
+        job_id = jobs.submit("q.jsonl", RECORDS.encode(), "baseline")["id"]
+        while jobs.status(job_id)["processed"] < 6:
+            await asyncio.sleep(0.005)
+        await jobs.stop()
+        return job_id
+
+    job_id = run(first_run())
+    assert run_status(tmp_path, job_id) == "running"
+    done_before = len(result_indices(tmp_path, job_id))
+    with open(os.path.join(tmp_path, job_id, "results.jsonl"), "a") as f:
+        f.write('{"index": 19, "id": "r1')  # crashed mid-write
+
+    async def second_run():
+        jobs = JobManager(process, path=str(tmp_path), concurrency=2, checkpoint_seconds=0)
+        await jobs.start()
+        while jobs.status(job_id)["status"] != "completed":
+            await asyncio.sleep(0.005)
+        await jobs.stop()
+        return jobs.status(job_id)
+
+    calls.clear()
+    status = run(second_run())
+    assert result_indices(tmp_path, job_id) == list(range(20))
+    assert status["succeeded"] == 20 and status["failed"] == 0
+    # Only the records missing from the results file were processed again
+    assert len(calls) <= 20 - done_before + 1  # r3 may be retried once more
+
+
+def test_broken_job_does_not_stop_the_runner(tmp_path):
+    async def process(record, variant):
+        return {}
+
+    async def main():
+        jobs = JobManager(process, path=str(tmp_path))
+        await jobs.start()
+        broken = jobs.submit("broken.jsonl", RECORDS.encode(), "baseline")["id"]
+        os.remove(os.path.join(tmp_path, broken, "input.jsonl"))
+        deleted = jobs.submit("deleted.jsonl", RECORDS.encode(), "baseline")["id"]
+        shutil.rmtree(os.path.join(tmp_path, deleted))
+        ok = jobs.submit("ok.jsonl", RECORDS.encode(), "baseline")["id"]
+        while jobs.status(ok)["status"] != "completed":
+            await asyncio.sleep(0.01)
+        await jobs.stop()
+        return jobs.status(broken), jobs.status(deleted)
+
+    broken, deleted = run(main())
+    assert broken["status"] == "failed" and "input.jsonl" in broken["error"]
+    assert deleted is None
+
+
+def test_csv_with_byte_order_mark_and_missing_columns(tmp_path):
+    async def process(record, variant):
+        return {"echo": record["answer1"]}
+
+    async def main():
+        jobs = JobManager(process, path=str(tmp_path))
+        await jobs.start()
+        excel = "\ufeffanswer1,answer2,answer3\nhold,steady,no\n".encode("utf-8")
+        job_id = jobs.submit("export.csv", excel, "baseline")["id"]
+        while jobs.status(job_id)["status"] != "completed":
+            await asyncio.sleep(0.01)
+        try:
+            jobs.submit("partial.csv", b"answer1,answer2\nhold,steady\n", "baseline")
+        except ValueError as e:
+            error = str(e)
+        await jobs.stop()
+        return jobs.status(job_id), error
+
+    status, error = run(main())
+    assert status["succeeded"] == 1 and status["failed"] == 0
+    assert "answer3" in error
+    assert [j for j in os.listdir(tmp_path)] == [status["id"]]  # rejected upload left nothing behind
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+json_repair: fields of streaming/truncated JSON, object extraction from
+wrapped LLM output, number and enum coercion, and detection of output
+cut off before the required enum fields.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from json_repair import (coerce_number, extract_json_object, match_enum,  # noqa: E402
+                         missing_required_enums, partial_json_fields)
+from risk_core import SCHEMA  # noqa: E402
+
+LOSS = ["very_low", "low", "moderate", "high", "very_high"]
+
+
+@pytest.mark.parametrize("text,fields", [
+    ('', {}),
+    ('{"goal": "house", "timeline_years": 3, "loss_aver', {"goal": "house", "timeline_years": 3}),
+    ('{"goal": "house", "timeline_years": 3', {"goal": "house"}),  # number may still grow
+    ('{"goal": "hou', {}),
+    ('{"notes": {"a": 1}, "x": [1, 2', {"notes": {"a": 1}}),
+    ('Sure! {"a": 1, "b": "c"}', {"a": 1, "b": "c"}),
+])
+def test_partial_json_fields(text, fields):
+    assert partial_json_fields(text) == fields
+
+
+@pytest.mark.parametrize("text,obj", [
+    ('```json\n{"a": 1,}\n```', {"a": 1}),
+    ('Here you go: {"a": [1, 2,], "b": "x"} Thanks', {"a": [1, 2], "b": "x"}),
+    ('{"a": 1, "b": "tru', {"a": 1}),
+    ('no json here', None),
+    ('{"a', None),
+])
+def test_extract_json_object(text, obj):
+    assert extract_json_object(text) == obj
+
+
+@pytest.mark.parametrize("value,number", [
+    (3, 3.0),
+    (2.5, 2.5),
+    ("3", 3.0),
+    ("~3 years", 3.0),
+    ("2-3", 2.5),
+    ("1,000", 1000.0),
+    ("soon", None),
+    (True, None),
+    (None, None),
+])
+def test_coerce_number(value, number):
+    assert coerce_number(value) == number
+
+
+@pytest.mark.parametrize("value,matched", [
+    ("high", "high"),
+    ("Very High", "very_high"),
+    ("very-low", "very_low"),
+    ("medium", "moderate"),
+    ("hihg", "high"),
+    ("banana", None),
+    (3, None),
+])
+def test_match_enum(value, matched):
+    assert match_enum(value, LOSS) == matched
+
+
+def test_missing_required_enums():
+    complete = {"loss_aversion": "high", "liquidity_need": "low", "income_stability": "stable",
+                "knowledge_level": "novice"}
+    assert missing_required_enums(complete, SCHEMA) == []
+    # goal and timeline_years are required but not enums: normalization may default them
+    truncated = {"goal": "house", "timeline_years": 3, "loss_aversion": "high", "liquidity_need": ""}
+    assert missing_required_enums(truncated, SCHEMA) == ["liquidity_need", "income_stability", "knowledge_level"]
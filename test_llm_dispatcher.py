@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+LLMDispatcher against a fake backend: a full queue is rejected up front,
+queued generations run in priority order, a cancelled waiter gives up its
+place, and the deadline covers a stalled stream.
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from llm_client import PRIORITY_BULK, PRIORITY_INTERACTIVE, Backend, LLMDispatcher, LLMOverloaded  # noqa: E402
+
+
+class FakeClient:
+    """Stands in for OllamaClient: each generation waits for `gate`, then echoes the prompt"""
+
+    def __init__(self):
+        self.base_url = "fake"
+        self.model = "fake"
+        self.timeout = 5.0
+        self.started = []
+        self.gate = asyncio.Event()
+
+    async def stream(self, prompt, format="json", options=None):
+        self.started.append(prompt)
+        await self.gate.wait()
+        yield prompt
+
+
+def dispatcher(slots=1, max_queue=2):
+    client = FakeClient()
+    return LLMDispatcher([Backend(client, slots)], max_queue=max_queue), client
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_full_queue_is_rejected_without_waiting():
+    async def main():
+        llm, client = dispatcher(slots=1, max_queue=1)
+        running = asyncio.ensure_future(llm.generate("a"))
+        queued = asyncio.ensure_future(llm.generate("b"))
+        await settle()
+        with pytest.raises(LLMOverloaded) as e:
+            llm.check_capacity()
+        assert e.value.retry_after >= 1
+        with pytest.raises(LLMOverloaded):
+            await llm.generate("c")
+        client.gate.set()
+        assert await asyncio.gather(running, queued) == ["a", "b"]
+        return llm.stats()
+
+    stats = asyncio.run(main())
+    assert stats["rejected"] == 2 and stats["waiting"] == 0
+    assert stats["backends"][0]["in_flight"] == 0 and stats["backends"][0]["completed"] == 2
+
+
+def test_interactive_generations_run_before_bulk():
+    async def main():
+        llm, client = dispatcher(slots=1, max_queue=8)
+        tasks = [asyncio.ensure_future(llm.generate("first"))]
+        await settle()
+        for name, priority in (("bulk1", PRIORITY_BULK), ("bulk2", PRIORITY_BULK),
+                               ("interactive", PRIORITY_INTERACTIVE)):
+            tasks.append(asyncio.ensure_future(llm.generate(name, priority=priority)))
+            await settle()
+        client.gate.set()
+        await asyncio.gather(*tasks)
+        return client.started
+
+    assert asyncio.run(main()) == ["first", "interactive", "bulk1", "bulk2"]
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def main():
+        llm, client = dispatcher(slots=1, max_queue=2)
+        running = asyncio.ensure_future(llm.generate("a"))
+        cancelled = asyncio.ensure_future(llm.generate("b"))
+        queued = asyncio.ensure_future(llm.generate("c"))
+        await settle()
+        assert llm.stats()["waiting"] == 2
+        cancelled.cancel()
+        await settle()
+        assert llm.stats()["waiting"] == 1
+        client.gate.set()
+        assert await asyncio.gather(running, queued) == ["a", "c"]
+        return llm.stats(), client.started
+
+    stats, started = asyncio.run(main())
+    assert started == ["a", "c"]
+    assert stats["waiting"] == 0 and stats["backends"][0]["in_flight"] == 0
+
+
+def test_deadline_covers_a_stalled_stream():
+    async def main():
+        llm, _ = dispatcher()
+        with pytest.raises(asyncio.TimeoutError):
+            await llm.generate("a", timeout=0.05)
+        return llm.stats()
+
+    assert asyncio.run(main())["backends"][0]["in_flight"] == 0
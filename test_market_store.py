@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+market_store: stored return snapshots match the in-memory computation,
+the store lock makes concurrent loaders fill an empty store once, and
+readers notice a newly published version.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from market_store import MarketStore, compute_returns
+
+TICKERS = {"equity": "E", "bonds": "B", "cash": "C"}
+
+
+def prices(days=900, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2018-01-01", periods=days)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (days, 3)), axis=0))
+    return pd.DataFrame(closes, index=index, columns=list(TICKERS))
+
+
+def test_stored_returns_match_computed(tmp_path):
+    store = MarketStore(str(tmp_path))
+    store.save(prices(), TICKERS)
+    loaded = store.load(TICKERS)
+    for stored, computed in zip(store.load_returns(loaded), compute_returns(loaded)):
+        pd.testing.assert_frame_equal(stored, computed, check_freq=False)
+        assert isinstance(stored.values, np.ndarray) and not stored.values.flags.writeable  # memory-mapped
+
+
+def test_lock_lets_one_loader_fill_the_store(tmp_path):
+    store = MarketStore(str(tmp_path))
+    downloads = []
+
+    def load():
+        reader = MarketStore(str(tmp_path))
+        with reader.lock():
+            if reader.load(TICKERS) is None:
+                downloads.append(1)
+                reader.save(prices(), TICKERS)
+
+    threads = [threading.Thread(target=load) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(downloads) == 1
+    assert store.load(TICKERS) is not None
+
+
+def test_current_version_follows_the_manifest(tmp_path):
+    reader, writer = MarketStore(str(tmp_path)), MarketStore(str(tmp_path))
+    assert reader.current_version() is None
+    first = writer.save(prices(seed=1), TICKERS)
+    assert reader.current_version() == first
+    second = writer.save(prices(seed=2), TICKERS)
+    assert reader.current_version() == second != first
+    assert sorted(p.name for p in tmp_path.glob("*.npy")) == sorted(
+        f"{kind}-{second}.npy" for kind in ("prices", "dates", "monthly", "monthly_dates", "daily", "daily_dates")
+    )
+
+
+def test_refresh_rebuilds_when_a_sleeve_switches_ticker(tmp_path, monkeypatch):
+    import backtest
+
+    store = MarketStore(str(tmp_path))
+    history = prices(days=900)
+    history.attrs["sources"] = dict(TICKERS)
+    store.save(history, TICKERS)
+    downloads = []
+
+    def download(tickers, start):
+        downloads.append(start)
+        latest = prices(days=920)  # same series, 20 more days
+        latest.attrs["sources"] = {**TICKERS, "cash": current_cash}
+        return latest if start == "2014-01-01" else latest.iloc[-40:]
+
+    monkeypatch.setattr(backtest, "download_sleeves", download)
+    current_cash = "C"
+    assert len(store.refresh(TICKERS, start="2014-01-01")) == 920  # incremental: same tickers
+    assert downloads[-1] != "2014-01-01"
+
+    current_cash = "synthetic"
+    store.refresh(TICKERS, start="2014-01-01")
+    assert downloads[-1] == "2014-01-01"  # not spliced onto the stored cash history
+    assert store.manifest()["sources"]["cash"] == "synthetic"
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+monte_carlo: block-bootstrap indices, chunking and the vectorized
+contribution formula against a plain month-by-month loop.
+"""
+import numpy as np
+
+from monte_carlo import bootstrap_indices, project, report_months, simulate_wealth
+
+RETS = np.random.default_rng(0).normal(0.007, 0.04, 130)
+
+
+def test_blocks_are_contiguous_and_circular():
+    idx = bootstrap_indices(np.random.default_rng(1), 130, 50, 36, 12)
+    assert idx.shape == (50, 36)
+    blocks = idx.reshape(50, 3, 12)
+    np.testing.assert_array_equal(np.diff(blocks, axis=2) % 130, 1)
+
+
+def test_contributions_match_monthly_loop():
+    months = np.arange(1, 25)
+    wealth = simulate_wealth(RETS, 24, 7, months, block=6, initial=2.0, contribution=0.5, seed=3)
+    idx = bootstrap_indices(np.random.default_rng(3), len(RETS), 7, 24, 6)
+    w = np.full(7, 2.0)
+    for t in range(24):
+        w = w * (1 + RETS[idx[:, t]]) + 0.5
+        np.testing.assert_allclose(wealth[:, t], w)
+
+
+def test_chunking_does_not_change_a_single_chunk_result():
+    months = report_months(60)
+    one = simulate_wealth(RETS, 60, 500, months, seed=7, chunk_paths=500)
+    again = simulate_wealth(RETS, 60, 500, months, seed=7, chunk_paths=500)
+    np.testing.assert_array_equal(one, again)
+    chunked = simulate_wealth(RETS, 60, 500, months, seed=7, chunk_paths=128)
+    assert chunked.shape == one.shape
+    # Different draws, same distribution
+    assert abs(np.median(chunked[:, -1]) / np.median(one[:, -1]) - 1) < 0.05
+
+
+def test_project_bands_and_success_probability():
+    out = project(RETS, 360, n_paths=2000, target=3.0, seed=0)
+    assert out["months"][-1] == 360 and len(out["months"]) <= 121
+    bands = np.array([out["bands"][q] for q in (5, 25, 50, 75, 95)])
+    assert np.all(np.diff(bands, axis=0) >= 0)
+    assert 0.0 <= out["success_probability"] <= 1.0
+    assert out["final"][50] == bands[2, -1]
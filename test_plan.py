@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+/plan with a stubbed profiler: the response is the profile, its weights and
+the same analytics /analytics returns (through the shared result cache), and
+a ValueError is a 400 on /plan and on every /analytics form alike.
+"""
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import main  # noqa: E402
+import services  # noqa: E402
+from market_store import MarketStore  # noqa: E402
+from models import ProfileResponse, RiskProfile, Variant, WeightsRequest  # noqa: E402
+
+ANSWERS = {"answer1": "I'd hold but feel stressed.", "answer2": "Steady growth, some risk okay.",
+           "answer3": "Down payment in ~3 years."}
+AXES = {"time_horizon": 0.1, "loss_aversion": 0.75, "liquidity": 1.0, "income_stability": 0.0,
+        "knowledge_caution": 0.5}
+PROFILE = ProfileResponse(profile=RiskProfile(timeline_years=3.0), axes=AXES, score=35.0, label="Balanced Builder")
+
+
+def stub_profiler(monkeypatch, service):
+    calls = []
+
+    async def generate_profile(answers, *args, **kwargs):
+        calls.append(answers)
+        return PROFILE
+
+    monkeypatch.setattr(service, "generate_profile", generate_profile)
+    return calls
+
+
+def request(method, url, **kwargs):
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, url, **kwargs)
+
+    return asyncio.run(send())
+
+
+def test_plan_combines_profile_weights_and_analytics(monkeypatch, service):
+    calls = stub_profiler(monkeypatch, service)
+    response = request("POST", "/plan", json={"answers": ANSWERS, "variant": "aggressive"})
+    assert response.status_code == 200
+    plan = response.json()
+    assert calls[0].answer3 == ANSWERS["answer3"]
+    assert plan["profile"] == json.loads(PROFILE.model_dump_json())
+
+    weights = service.calculate_weights(WeightsRequest(label=PROFILE.label, variant=Variant.aggressive, axes=AXES))
+    assert plan["weights"] == json.loads(weights.model_dump_json())
+
+    # The analytics part is the /analytics response for those weights, filed in its cache
+    analytics = request("POST", "/analytics", json={"user_weights": weights.weights, "label": PROFILE.label,
+                                                     "axes": AXES})
+    assert plan["analytics"] == analytics.json()
+    assert service.analytics_cache.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize("method,url,kwargs", [
+    ("POST", "/plan", {"json": {"answers": ANSWERS}}),
+    ("POST", "/analytics", {"json": {"user_weights": {"equity": 1.0}, "label": "Balanced Builder", "axes": AXES}}),
+    ("GET", "/analytics", {"params": {"weights": "equity:1.0", "label": "Balanced Builder",
+                                      "axes": ",".join(f"{k}:{v}" for k, v in AXES.items())}}),
+    ("POST", "/analytics/compact", {"json": {"user_weights": {"equity": 1.0}, "label": "Balanced Builder",
+                                             "axes": AXES}}),
+])
+def test_value_error_is_a_bad_request_everywhere(monkeypatch, tmp_path, method, url, kwargs):
+    # No market data yet and an external loader: loading raises ValueError("Market data store is empty ...")
+    monkeypatch.setattr(services, "MARKET_DATA_LOADER", "external")
+    service = main.RiskProfilerService()
+    service.market_store = MarketStore(str(tmp_path))
+    monkeypatch.setattr(main, "risk_profiler", service)
+    stub_profiler(monkeypatch, service)
+
+    response = request(method, url, **kwargs)
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Market data store is empty")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+profile_cache: LRU eviction, TTL expiry, and the SQLite tier surviving a
+restart and promoting hits back into memory (also through aget/aset).
+"""
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import profile_cache  # noqa: E402
+from profile_cache import ProfileCache  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ProfileCache(max_entries=2, db_path=None)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}  # "b" is now least recently used
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1} and cache.get("c") == {"v": 3}
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["size"] == 2
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch, tmp_path):
+    clock = Clock()
+    monkeypatch.setattr(profile_cache.time, "time", clock.time)
+    cache = ProfileCache(ttl=60, db_path=str(tmp_path / "cache.db"))
+    cache.set("a", {"v": 1})
+    clock.now += 59
+    assert cache.get("a") == {"v": 1}
+    clock.now += 2
+    assert cache.get("a") is None  # expired in memory and on disk
+    assert cache.stats()["expirations"] == 2
+    assert ProfileCache(ttl=60, db_path=str(tmp_path / "cache.db")).get("a") is None
+
+
+def test_disk_hit_is_promoted_to_memory(tmp_path):
+    db = str(tmp_path / "cache.db")
+    ProfileCache(db_path=db).set("a", {"v": 1})
+    restarted = ProfileCache(db_path=db)
+    assert restarted.get("a") == {"v": 1}
+    assert restarted.get("a") == {"v": 1}
+    stats = restarted.stats()
+    assert stats["disk_hits"] == 1 and stats["hits"] == 2 and stats["size"] == 1
+
+
+def test_async_access_uses_the_same_tiers(tmp_path):
+    db = str(tmp_path / "cache.db")
+
+    async def main():
+        await ProfileCache(db_path=db).aset("a", {"v": 1})
+        restarted = ProfileCache(db_path=db)
+        return await restarted.aget("a"), await restarted.aget("missing"), restarted.stats()
+
+    value, missing, stats = asyncio.run(main())
+    assert value == {"v": 1} and missing is None
+    assert stats["disk_hits"] == 1 and stats["misses"] == 1
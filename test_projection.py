@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+/projection: run_projection reports what monte_carlo.project gives for the
+portfolio's monthly returns (bands, final percentiles, success probability),
+is reproducible with a seed and rejects bad weights and percentiles.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from metrics_engine import portfolio_returns  # noqa: E402
+from models import ProjectionRequest  # noqa: E402
+from monte_carlo import project  # noqa: E402
+
+WEIGHTS = {"equity": 0.6, "bonds": 0.35, "cash": 0.05}
+
+
+def test_projection_matches_monte_carlo_engine(service):
+    request = ProjectionRequest(weights={"equity": 0.6, "bonds": 0.4}, horizon_years=2.5, n_paths=500,
+                                block_months=6, initial=10.0, monthly_contribution=0.5, target=30.0,
+                                percentiles=[10, 50, 90], seed=7)
+    result = service.run_projection(request)
+
+    rets = service._cached_data
+    port_rets = portfolio_returns(rets.values, np.array([0.6, 0.4, 0.0]))[:, 0]
+    expected = project(port_rets, horizon=30, n_paths=500, block=6, initial=10.0, contribution=0.5,
+                       target=30.0, percentiles=[10, 50, 90], seed=7)
+
+    assert result.months == expected["months"].tolist() and result.months[-1] == 30
+    assert set(result.bands) == set(result.final) == {"p10", "p50", "p90"}
+    for q in (10, 50, 90):
+        np.testing.assert_allclose(result.bands[f"p{q}"], expected["bands"][q])
+        assert result.final[f"p{q}"] == pytest.approx(float(expected["final"][q]))
+    assert result.success_probability == pytest.approx(expected["success_probability"])
+    assert result.invested == pytest.approx(10.0 + 0.5 * 30)
+    assert result.n_paths == 500 and result.history_months == len(rets)
+    assert result.final["p10"] <= result.final["p50"] <= result.final["p90"]
+
+
+def test_projection_is_reproducible_with_a_seed(service):
+    request = ProjectionRequest(weights=WEIGHTS, horizon_years=5, n_paths=200, seed=1)
+    assert service.run_projection(request) == service.run_projection(request)
+
+
+@pytest.mark.parametrize("weights,percentiles,message", [
+    ({"gold": 1.0}, [50], "Unknown asset classes"),
+    (WEIGHTS, [0, 50], "Percentiles"),
+    (WEIGHTS, [50, 100], "Percentiles"),
+])
+def test_projection_rejects_bad_input(service, weights, percentiles, message):
+    request = ProjectionRequest(weights=weights, horizon_years=1, n_paths=100, percentiles=percentiles)
+    with pytest.raises(ValueError, match=message):
+        service.run_projection(request)
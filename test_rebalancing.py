@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Golden tests: rebalancing.rebalanced_returns must match a plain day-by-day
+holdings simulation for every schedule, and monthly rebalancing of monthly
+returns must be the constant mix used by the analytics endpoint.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from rebalancing import SCHEDULES, rebalanced_returns
+
+WEIGHTS = np.array([
+    [0.60, 0.35, 0.05],
+    [0.20, 0.70, 0.10],
+    [1.00, 0.00, 0.00],
+]).T
+CALENDAR_MONTHS = {"monthly": 1, "quarterly": 3, "annual": 12}
+
+
+def daily_returns(seed=0, days=1500):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2015-01-01", periods=days)
+    rets = rng.normal([0.0004, 0.0002, 0.0001], [0.012, 0.004, 0.0005], (days, 3))
+    return rets, index
+
+
+def reference_returns(rets, w, index, schedule, band):
+    """Holdings walked forward one row at a time"""
+    holdings, value, out, count = w.copy(), 1.0, [], 0
+    for t in range(len(rets)):
+        holdings = holdings * (1 + rets[t])
+        new_value = holdings.sum()
+        out.append(new_value / value - 1)
+        value = new_value
+        if t + 1 == len(rets) or schedule == "none":
+            continue
+        if schedule == "threshold":
+            rebalance = np.abs(holdings / value - w).max() > band
+        else:
+            k = CALENDAR_MONTHS[schedule]
+            period = lambda d: (d.year * 12 + d.month - 1) // k
+            rebalance = period(index[t]) != period(index[t + 1])
+        if rebalance:
+            holdings, count = w * value, count + 1
+    return np.array(out), count
+
+
+@pytest.mark.parametrize("schedule", SCHEDULES)
+def test_matches_reference_simulation(schedule):
+    rets, index = daily_returns()
+    port_rets, counts = rebalanced_returns(rets, WEIGHTS, index, schedule, band=0.03)
+    for j in range(WEIGHTS.shape[1]):
+        expected, count = reference_returns(rets, WEIGHTS[:, j], index, schedule, 0.03)
+        np.testing.assert_allclose(port_rets[:, j], expected, rtol=0, atol=1e-12)
+        assert counts[j] == count
+
+
+def test_monthly_rebalancing_of_monthly_returns_is_constant_mix():
+    rng = np.random.default_rng(1)
+    index = pd.date_range("2010-01-31", periods=180, freq="ME")
+    rets = rng.normal(0.005, 0.03, (180, 3))
+    port_rets, counts = rebalanced_returns(rets, WEIGHTS, index, "monthly")
+    np.testing.assert_allclose(port_rets, rets @ WEIGHTS, rtol=0, atol=1e-14)
+    assert list(counts) == [179] * 3
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+result_cache: If-None-Match matching (weak, list and * forms), LRU eviction
+by entry count and body size, and GET/POST /analytics answering a matching
+ETag with 304 and repeated requests from the cache.
+"""
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import main  # noqa: E402
+from result_cache import ResultCache, etag_matches  # noqa: E402
+
+QUERY = {"weights": "equity:0.6,bonds:0.35,cash:0.05", "label": "Balanced Builder",
+         "axes": "time_horizon:0.5,loss_aversion:0.5,liquidity:0.5,income_stability:0.5,knowledge_caution:0.5"}
+BODY = {"user_weights": {"equity": 0.6, "bonds": 0.35, "cash": 0.05}, "label": "Balanced Builder",
+        "axes": {"time_horizon": 0.5, "loss_aversion": 0.5, "liquidity": 0.5, "income_stability": 0.5,
+                 "knowledge_caution": 0.5}}
+
+
+@pytest.mark.parametrize("header,matches", [
+    (None, False),
+    ("", False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", W/"abc"', True),
+    ('"xyz","abc"', True),
+    ("*", True),
+    ('"xyz"', False),
+    ('"abcd"', False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, "abc") is matches
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"  # "b" is now least recently used
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1" and cache.get("c") == b"3"
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["size"] == 2
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_total_body_size_is_bounded():
+    cache = ResultCache(max_entries=10, max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.set("c", b"1234")  # 12 bytes: "a" goes
+    assert cache.get("a") is None and cache.get("b") == b"1234"
+    cache.set("d", b"x" * 11)  # larger than the whole cache: not stored, nothing evicted
+    assert cache.get("d") is None and cache.get("c") == b"1234"
+    stats = cache.stats()
+    assert stats["size"] == 2 and stats["bytes"] == 8 and stats["evictions"] == 1
+
+
+def request(method, url, **kwargs):
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, url, **kwargs)
+
+    return asyncio.run(send())
+
+
+def test_get_analytics_revalidates_with_etag(service):
+    first = request("GET", "/analytics", params=QUERY)
+    assert first.status_code == 200 and first.json()["portfolios"]
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    for header in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+        revalidated = request("GET", "/analytics", params=QUERY, headers={"If-None-Match": header})
+        assert revalidated.status_code == 304 and revalidated.headers["etag"] == etag
+        assert revalidated.content == b""
+
+    changed = request("GET", "/analytics", params={**QUERY, "weights": "equity:0.5,bonds:0.45,cash:0.05"},
+                      headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+    stats = service.analytics_cache.stats()
+    assert stats["not_modified"] == 4
+    assert stats["misses"] == 2 and stats["hits"] == 0 and stats["size"] == 2
+
+
+def test_post_analytics_is_served_from_the_cache(service):
+    first = request("POST", "/analytics", json=BODY)
+    second = request("POST", "/analytics", json=BODY)
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content and first.headers["etag"] == second.headers["etag"]
+    # Same ETag as the GET form of the same request
+    assert request("GET", "/analytics", params=QUERY).headers["etag"] == first.headers["etag"]
+    stats = service.analytics_cache.stats()
+    assert stats["misses"] == 1 and stats["hits"] == 2
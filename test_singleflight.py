@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+singleflight: concurrent callers share one execution, waiters are counted
+while they are joined, and broadcast subscribers that join late get the
+events published so far.
+"""
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from singleflight import Broadcast, SingleFlight  # noqa: E402
+
+
+def test_concurrent_calls_share_one_execution():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+        return results, flights.stats()
+
+    results, stats = asyncio.run(main())
+    assert results == ["result"] * 5 and len(calls) == 1
+    assert stats == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_join_counts_waiters():
+    async def main():
+        flights = SingleFlight()
+        with flights.join("k", lambda: asyncio.sleep(0.01)) as task:
+            waiter = asyncio.ensure_future(flights.do("k", lambda: asyncio.sleep(1)))
+            await asyncio.sleep(0)
+            assert flights.waiters(task) == 2
+            await waiter
+            assert flights.waiters(task) == 1
+        assert flights.waiters(task) == 0
+
+    asyncio.run(main())
+
+
+def test_broadcast_replays_history_to_late_subscribers():
+    async def main():
+        broadcast = Broadcast()
+        early = broadcast.subscribe()
+        broadcast.publish("progress", 1)
+        late = broadcast.subscribe()
+        broadcast.publish("progress", 2)
+        broadcast.close()
+        after = broadcast.subscribe()
+
+        async def drain(queue):
+            items = []
+            while (item := await queue.get()) is not None:
+                items.append(item)
+            return items
+
+        return [await drain(q) for q in (early, late, after)]
+
+    expected = [("progress", 1), ("progress", 2)]
+    assert asyncio.run(main()) == [expected, expected, expected]
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+timings: Server-Timing entries are qualified by operation, and repeated
+stages of one operation (e.g. an LLM retry) are summed.
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from timings import begin_request, end_request, server_timing_header, stage  # noqa: E402
+
+
+def test_stages_are_named_by_operation():
+    timings, token = begin_request()
+    try:
+        for operation, name in (("profile", "build"), ("profile", "llm"), ("profile", "llm"),
+                                ("analytics", "build"), ("analytics", "data")):
+            with stage(operation, name):
+                pass
+    finally:
+        end_request(token)
+    names = [entry.split(";")[0] for entry in server_timing_header(timings).split(", ")]
+    assert names == ["profile-build", "profile-llm", "analytics-build", "analytics-data"]